@@ -0,0 +1,74 @@
+"""Compares garbage collector work of headless games with and without sprite pooling.
+
+Run from the repository root (the argument is the number of episodes):
+python3 -m benchmarks.gc_pressure
+python3 -m benchmarks.gc_pressure 1000
+"""
+import gc
+import random
+import sys
+import time
+from src.planegame import FlightGame
+from src.game_utils.game_objects import SpritePool, Enemy
+
+EPISODES = 10_000
+
+class _NoPool(SpritePool):
+    """Pool that drops killed sprites, i.e. every spawn creates a new one."""
+    def release(self, sprite):
+        pass
+
+def run_episodes(episodes: int, pooled: bool, seed: int = 0) -> dict:
+    """Plays seeded headless episodes with random moves and returns
+    created sprites, garbage collections per generation and time spent in them.
+    """
+    game = FlightGame(headless=True, seed=seed)
+    if not pooled:
+        game.enemy_pool = _NoPool(Enemy)
+    moves = random.Random(seed)
+
+    collections = [0, 0, 0]
+    gc_time = 0.0
+    gc_start = 0.0
+
+    def on_gc(phase, info):
+        nonlocal gc_time, gc_start
+        if phase == 'start':
+            gc_start = time.perf_counter()
+        else:
+            gc_time += time.perf_counter() - gc_start
+            collections[info['generation']] += 1
+
+    gc.collect()
+    gc.callbacks.append(on_gc)
+    steps = 0
+    start = time.perf_counter()
+    try:
+        for _ in range(episodes):
+            done = False
+            while not done:
+                _, done, _ = game.play_step(moves.randint(0, 8))
+                steps += 1
+            game.reset()
+    finally:
+        gc.callbacks.remove(on_gc)
+
+    return {
+        'steps': steps,
+        'rockets_created': game.enemy_pool.created,
+        'collections': collections,
+        'gc_ms': gc_time * 1000,
+        'steps_per_sec': steps / (time.perf_counter() - start),
+    }
+
+def main():
+    episodes = int(sys.argv[1]) if len(sys.argv) > 1 else EPISODES
+    print(f"{'':>8} {'steps':>10} {'rockets':>9} {'gen0':>7} {'gen1':>6} {'gen2':>5} {'gc [ms]':>9} {'steps/s':>9}")
+    for name, pooled in (('new', False), ('pooled', True)):
+        stats = run_episodes(episodes, pooled)
+        gen0, gen1, gen2 = stats['collections']
+        print(f"{name:>8} {stats['steps']:>10} {stats['rockets_created']:>9} {gen0:>7} {gen1:>6} {gen2:>5} "
+              f"{stats['gc_ms']:>9.1f} {stats['steps_per_sec']:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Checks that the vectorized radar and VecFlightEnv give the same results
+as the sprite based code they replace.
+
+Run from the repository root (exits with status 1 on a mismatch):
+python3 -m benchmarks.parity
+"""
+import random
+import sys
+import numpy as np
+from src.planegame import FlightGame
+from src.vec_planegame import VecFlightEnv, ENEMY_WIDTH
+from src.game_utils.config import SCREEN_WIDTH, SCREEN_HEIGHT, RADAR_SIZE, ENEMY_SPEED_RANGE, PLAYER_SIZE
+from src.game_utils.game_objects import PlaneRadar, PlaneData, RadarRectangle
+
+TRIALS = 2000
+MAX_ROCKETS = 12
+
+def check_radar(trials: int, rng: random.Random) -> list:
+    """Compares PlaneRadar.get_radar_states with a colliderect loop over
+    every radar area and rocket, as in RadarRectangle.paint_area.
+    """
+    failures = []
+    width, height = PLAYER_SIZE
+    for trial in range(trials):
+        plane_data = PlaneData(
+            left=rng.randint(-50, SCREEN_WIDTH), top=rng.randint(-50, SCREEN_HEIGHT),
+            width=width, height=height,
+        )
+        radar = PlaneRadar(size=RADAR_SIZE, plane_data=plane_data, render=False)
+        rects = np.array([
+            (left, top, left + rng.randint(1, 120), top + rng.randint(1, 60))
+            for left, top in ((rng.randint(-100, SCREEN_WIDTH), rng.randint(-60, SCREEN_HEIGHT))
+                              for _ in range(rng.randint(0, 40)))
+        ], dtype=np.int32).reshape(-1, 4)
+
+        expected = []
+        rocket_rects = [(l, t, r - l, b - t) for l, t, r, b in rects.tolist()]
+        for left, top, right, bottom in radar.areas.tolist():
+            area = RadarRectangle(left, top, right - left, bottom - top, render=False)
+            expected.append(int(area.check_collisions(rocket_rects)))
+
+        if radar.get_radar_states(rects).tolist() != expected:
+            failures.append(f'radar trial {trial}: plane at {plane_data[:2]}, {len(rects)} rockets')
+    return failures
+
+def _random_scenario(env: VecFlightEnv, rng: random.Random) -> tuple:
+    """Returns a player position and rockets around it, often at the edges of
+    the playing area and at the left edge of the screen."""
+    def coordinate(maximum):
+        return rng.choice((rng.randint(0, 10), rng.randint(maximum - 10, maximum), rng.randint(0, maximum)))
+
+    player = (coordinate(env.max_left), coordinate(env.max_top))
+    rockets = []
+    for _ in range(rng.randint(0, MAX_ROCKETS)):
+        if rng.random() < 0.3:
+            # About to leave the screen
+            left = rng.randint(-ENEMY_WIDTH - 20, 0)
+        else:
+            left = player[0] + rng.randint(-40, 120)
+        top = player[1] + rng.randint(-30, 40)
+        rockets.append((left, top, rng.randint(*ENEMY_SPEED_RANGE)))
+    return player, rockets
+
+def _set_scenario(env: VecFlightEnv, game: FlightGame, player: tuple, rockets: list):
+    env.reset()
+    env.player_left[0], env.player_top[0] = player
+    for slot, (left, top, speed) in enumerate(rockets):
+        env.enemy_left[0, slot], env.enemy_top[0, slot], env.enemy_speed[0, slot] = left, top, speed
+        env.alive[0, slot] = True
+
+    game.reset()
+    game.player.rect.topleft = player
+    game.update_plane_data()
+    game.radar.move_to(game.plane_data)
+    for left, top, speed in rockets:
+        enemy = game.enemy_pool.get(game.rng, game.enemy_grid)
+        enemy.rect.topleft = (left, top)
+        enemy.speed = speed
+        game.enemy_grid.move(enemy)
+        game.enemies.add(enemy)
+        game.all_sprites.add(enemy)
+
+def check_env(trials: int, rng: random.Random) -> list:
+    """Steps VecFlightEnv and FlightGame from the same player and rocket
+    positions with the same action and compares the outcome. No rockets
+    are spawned in these frames, spawning draws from different generators.
+    """
+    failures = []
+    env = VecFlightEnv(1, seed=0)
+    game = FlightGame(headless=True, seed=0)
+    counts = {'at_edge': 0, 'crash': 0, 'hit': 0, 'rocket_gone': 0}
+    for trial in range(trials):
+        player, rockets = _random_scenario(env, rng)
+        _set_scenario(env, game, player, rockets)
+        action = rng.randint(0, 8)
+
+        next_states, rewards, dones, _ = env.step(np.array([action]))
+        reward, done, _ = game.play_step(action)
+
+        mismatches = []
+        if (float(rewards[0]), bool(dones[0])) != (float(reward), bool(done)):
+            mismatches.append(f'reward/done {float(rewards[0]), bool(dones[0])} != {float(reward), bool(done)}')
+        # The env resets finished games right away, and their states are not
+        # used (the radar of FlightGame isn't moved after a crash into a rocket)
+        if not done:
+            env_player = (int(env.player_left[0]), int(env.player_top[0]))
+            if env_player != game.player.rect.topleft:
+                mismatches.append(f'player {env_player} != {game.player.rect.topleft}')
+            env_rockets = sorted(
+                (int(left), int(top)) for left, top, alive
+                in zip(env.enemy_left[0], env.enemy_top[0], env.alive[0]) if alive
+            )
+            game_rockets = sorted(enemy.rect.topleft for enemy in game.enemies)
+            if env_rockets != game_rockets:
+                mismatches.append(f'rockets {env_rockets} != {game_rockets}')
+            if next_states[0].tolist() != game.get_radar_states().tolist():
+                mismatches.append('radar states differ')
+        if mismatches:
+            failures.append(f'env trial {trial}: player {player}, action {action}, rockets {rockets}: '
+                            + '; '.join(mismatches))
+
+        counts['at_edge'] += player[0] in (0, env.max_left) or player[1] in (0, env.max_top)
+        counts['crash'] += reward == -10
+        counts['hit'] += reward == -20
+        counts['rocket_gone'] += reward > 0
+    print('Env cases:', counts)
+    return failures
+
+def main():
+    rng = random.Random(0)
+    failures = check_radar(TRIALS, rng) + check_env(TRIALS, rng)
+    for failure in failures[:20]:
+        print(failure)
+    print('Mismatches:', len(failures))
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
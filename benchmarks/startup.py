@@ -0,0 +1,51 @@
+"""Measures import time of every command with python -X importtime.
+
+Run from the repository root:
+python3 -m benchmarks.startup
+"""
+import subprocess
+import sys
+
+# Imports done by main.py and by each of its commands
+COMMANDS = {
+    'cli': 'import main',
+    'play': 'import main; import src.planegame',
+    'training': 'import main; import src.agent',
+    'worker': 'import main; import src.distributed',
+    'evaluate': 'import main; import src.evaluation',
+}
+# Slowest top-level imports listed for every command
+TOP_IMPORTS = 5
+
+def import_times(code: str) -> list:
+    """Returns (cumulative microseconds, module) of top-level imports of the code."""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, check=True
+    )
+    times = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        # Nested imports are indented
+        if not module.startswith('  '):
+            times.append((int(cumulative), module.strip()))
+    return times
+
+def startup_times() -> dict:
+    """Returns total import time in milliseconds of every command."""
+    return {
+        command: sum(cumulative for cumulative, _ in import_times(code)) / 1000
+        for command, code in COMMANDS.items()
+    }
+
+def main():
+    for command, code in COMMANDS.items():
+        times = import_times(code)
+        print(f"{command}: {sum(cumulative for cumulative, _ in times) / 1000:.1f} ms")
+        for cumulative, module in sorted(times, reverse=True)[:TOP_IMPORTS]:
+            print(f"    {module:<40} {cumulative / 1000:>8.1f} ms")
+
+if __name__ == "__main__":
+    main()
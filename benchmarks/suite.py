@@ -0,0 +1,199 @@
+"""Benchmarks of the environment, agent and trainer hot paths.
+
+Run from the repository root:
+python3 main.py --benchmark
+python3 main.py --benchmark --baseline benchmarks/baseline.json
+"""
+import json
+import platform
+import random
+import statistics
+import time
+import numpy as np
+import torch
+from src.agent import Agent, STATE_SIZE, HIDDEN_SIZE, BATCH_SIZE
+from src.planegame import FlightGame
+from src.game_utils.config import RADAR_SIZE
+from src.game_utils.game_objects import PlaneRadar
+from benchmarks.train_step import random_batch, time_call, BATCH_SIZES
+from benchmarks.startup import startup_times
+
+RESULTS_PATH = 'benchmarks/results.json'
+# Relative change against the baseline reported as a regression
+REGRESSION_THRESHOLD = 0.10
+# Calls timed in isolation vary more between runs of the same code, by up
+# to 25% on a shared single core machine, than the end-to-end numbers
+NOISY_THRESHOLD = 0.30
+THRESHOLDS = {
+    name: NOISY_THRESHOLD
+    for name in ('radar', 'get_state', 'get_action', 'train_long_memory', 'train_step_batch_1',
+                 'train_step_batch_100', 'train_step_batch_1000', 'startup_play')
+}
+# The suite is run ROUNDS times, one round of every benchmark after the
+# other, so a slow phase of the machine only hits some rounds of each. The
+# best round is kept, the distance of the median round to it is the noise
+ROUNDS = 5
+# Steps of the end-to-end training benchmark
+TRAINING_STEPS = 2000
+
+def _warmed_up_game(steps: int = 200) -> FlightGame:
+    """Returns a headless game with rockets on the screen."""
+    game = FlightGame(headless=True, seed=0)
+    stay = 8*[0] + [1]
+    for _ in range(steps):
+        _, done, _ = game.play_step(stay)
+        if done:
+            game.reset()
+    return game
+
+def _random_move() -> list:
+    final_move = 9*[0]
+    final_move[random.randint(0, 8)] = 1
+    return final_move
+
+def _result(rounds: list, unit: str, higher_is_better: bool) -> dict:
+    """Keeps the best of the rounds, noise is the relative distance of their median to it."""
+    best = max(rounds) if higher_is_better else min(rounds)
+    return {
+        'value': best,
+        'unit': unit,
+        'higher_is_better': higher_is_better,
+        'noise': abs(statistics.median(rounds) - best) / best,
+    }
+
+def bench_play_step() -> float:
+    # Every round plays the same moves from the same game state
+    random.seed(0)
+    game = _warmed_up_game()
+
+    def play_step():
+        _, done, _ = game.play_step(_random_move())
+        if done:
+            game.reset()
+    return time_call(play_step, repeats=2000) * 1000
+
+def bench_radar() -> float:
+    game = _warmed_up_game()
+
+    def radar():
+        radar = PlaneRadar(size=RADAR_SIZE, plane_data=game.plane_data, render=False)
+        radar.get_radar_states(game.enemies)
+    return time_call(radar, repeats=500) * 1000
+
+def bench_get_state(agent: Agent) -> float:
+    return time_call(agent.get_state, _warmed_up_game(), repeats=2000) * 1000
+
+def bench_get_action(agent: Agent) -> float:
+    state = agent.get_state(_warmed_up_game())
+    return time_call(agent.get_action, state, repeats=2000) * 1000
+
+def bench_train_long_memory(agent: Agent) -> float:
+    return time_call(agent.train_long_memory, repeats=20) * 1000
+
+def bench_train_step(agent: Agent, batch_size: int) -> float:
+    batch = random_batch(batch_size, np.random.default_rng(0))
+    # Small batches take well under a millisecond, run more of them
+    return time_call(agent.trainer.train_step, *batch, repeats=max(20, 2000 // batch_size)) * 1000
+
+def bench_training_steps_per_sec(network_dimensions: tuple) -> float:
+    """Headless training loop of src.agent.train in environment steps per second.
+    Every round plays the same seeded games with the same initial network.
+    """
+    torch.manual_seed(0)
+    agent = Agent(network_dimensions)
+    agent.rng = np.random.default_rng(0)
+    agent.memory.rng = np.random.default_rng(0)
+    game = FlightGame(headless=True, seed=0)
+    start = time.perf_counter()
+    for _ in range(TRAINING_STEPS):
+        state_old = agent.get_state(game)
+        final_move = agent.get_action(state_old)
+        reward, done, score = game.play_step(final_move)
+        state_new = agent.get_state(game)
+        agent.train_short_memory(state_old,final_move,reward,state_new,done)
+        agent.remember(state_old,final_move,reward,state_new,done)
+        if done:
+            game.reset()
+            agent.n_game += 1
+            agent.train_long_memory()
+    return TRAINING_STEPS / (time.perf_counter() - start)
+
+def run_benchmarks() -> dict:
+    """Returns results as {name: {"value", "unit", "higher_is_better", "noise"}}."""
+    random.seed(0)
+    network_dimensions = (STATE_SIZE, HIDDEN_SIZE, 9)
+    agent = Agent(network_dimensions)
+    agent.memory.push_batch(*random_batch(2*BATCH_SIZE, np.random.default_rng(0)))
+
+    # name: (function measuring one round, unit, higher_is_better)
+    benchmarks = {
+        'play_step': (bench_play_step, 'ms', False),
+        'radar': (bench_radar, 'ms', False),
+        'get_state': (lambda: bench_get_state(agent), 'ms', False),
+        'get_action': (lambda: bench_get_action(agent), 'ms', False),
+        'train_long_memory': (lambda: bench_train_long_memory(agent), 'ms', False),
+    }
+    for batch_size in BATCH_SIZES:
+        benchmarks[f'train_step_batch_{batch_size}'] = (
+            lambda batch_size=batch_size: bench_train_step(agent, batch_size), 'ms', False
+        )
+    benchmarks['training_steps_per_sec'] = (
+        lambda: bench_training_steps_per_sec(network_dimensions), 'steps/s', True
+    )
+
+    rounds = {name: [] for name in benchmarks}
+    startup_rounds = []
+    for _ in range(ROUNDS):
+        for name, (measure, _, _) in benchmarks.items():
+            rounds[name].append(measure())
+        startup_rounds.append(startup_times())
+
+    results = {name: _result(rounds[name], unit, higher_is_better)
+               for name, (_, unit, higher_is_better) in benchmarks.items()}
+    for command in startup_rounds[0]:
+        results[f'startup_{command}'] = _result([times[command] for times in startup_rounds], 'ms', False)
+    return results
+
+def compare(results: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> list:
+    """Returns names of benchmarks that got worse than the baseline by more
+    than their THRESHOLDS entry, or threshold if they have none.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        change = result['value'] / baseline[name]['value'] - 1
+        if result['higher_is_better']:
+            change = -change
+        if change > THRESHOLDS.get(name, threshold):
+            regressions.append(name)
+    return regressions
+
+def run_suite(output_path: str = RESULTS_PATH, baseline_path: str = None,
+              threshold: float = REGRESSION_THRESHOLD) -> bool:
+    """Runs all benchmarks, writes them to output_path and prints them
+    next to the baseline. Returns False if any benchmark regressed.
+    """
+    results = run_benchmarks()
+    with open(output_path, 'w') as file:
+        json.dump({
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'time': time.time(),
+            'results': results,
+        }, file, indent=2)
+
+    baseline = {}
+    if baseline_path is not None:
+        with open(baseline_path) as file:
+            baseline = json.load(file)['results']
+    regressions = compare(results, baseline, threshold)
+
+    print(f"{'benchmark':<28} {'value':>12} {'baseline':>12} {'unit':>8} {'noise':>7}")
+    for name, result in results.items():
+        base = f"{baseline[name]['value']:12.3f}" if name in baseline else f"{'-':>12}"
+        flag = '  REGRESSION' if name in regressions else ''
+        print(f"{name:<28} {result['value']:12.3f} {base} {result['unit']:>8} {result['noise']:>6.1%}{flag}")
+    print('Results written to', output_path)
+
+    return not regressions
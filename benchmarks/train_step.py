@@ -0,0 +1,63 @@
+"""Compares the batched QTrainer.train_step with the previous per-sample loop.
+
+Run from the repository root:
+python3 -m benchmarks.train_step
+"""
+import time
+import numpy as np
+import torch
+from src.agent import STATE_SIZE, HIDDEN_SIZE, LR, GAMMA
+from src.deep_qlearning.model import Linear_QNet, QTrainer
+
+BATCH_SIZES = (1, 100, 1000)
+REPEATS = 20
+
+def loop_train_step(trainer: QTrainer, state, action, reward, next_state, done):
+    """Previous train_step: one forward pass per sample for the targets."""
+    state = torch.as_tensor(state, dtype=torch.float)
+    next_state = torch.as_tensor(next_state, dtype=torch.float)
+    action = torch.as_tensor(action, dtype=torch.long)
+    reward = torch.as_tensor(reward, dtype=torch.float)
+
+    pred = trainer.model(state)
+    target = pred.clone()
+    for idx in range(len(done)):
+        Q_new = reward[idx]
+        if not done[idx]:
+            Q_new = reward[idx] + trainer.gamma * torch.max(trainer.model(next_state[idx]))
+        target[idx][action[idx].item()] = Q_new
+    trainer.optimer.zero_grad()
+    loss = trainer.criterion(target, pred)
+    loss.backward()
+    trainer.optimer.step()
+
+def random_batch(batch_size: int, rng: np.random.Generator):
+    return (
+        rng.integers(0, 2, size=(batch_size, STATE_SIZE), dtype=np.uint8),
+        rng.integers(0, 9, size=batch_size, dtype=np.int8),
+        rng.choice(np.array([0, 1, -10, -20], dtype=np.float32), size=batch_size),
+        rng.integers(0, 2, size=(batch_size, STATE_SIZE), dtype=np.uint8),
+        rng.random(batch_size) < 0.05,
+    )
+
+def time_call(function, *args, repeats: int = REPEATS) -> float:
+    """Returns the mean time of one call in seconds."""
+    function(*args) # warm up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function(*args)
+    return (time.perf_counter() - start) / repeats
+
+def main():
+    rng = np.random.default_rng(0)
+    trainer = QTrainer(Linear_QNet(STATE_SIZE, HIDDEN_SIZE, 9), lr=LR, gamma=GAMMA)
+
+    print(f"{'batch':>6} {'loop [ms]':>10} {'batched [ms]':>13} {'speedup':>8}")
+    for batch_size in BATCH_SIZES:
+        batch = random_batch(batch_size, rng)
+        loop_time = time_call(loop_train_step, trainer, *batch)
+        batched_time = time_call(trainer.train_step, *batch)
+        print(f"{batch_size:>6} {loop_time*1000:>10.3f} {batched_time*1000:>13.3f} {loop_time/batched_time:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,39 @@
 import click
-from src.planegame import FlightGame
-from src.agent import train
+from src.profiling import profiler
+
+# Modules of every command are imported only when the command runs, so
+# e.g. --play doesn't load torch and worker processes start quickly
 
 @click.command()
 @click.option('--play', is_flag=True, help="Play the game by yourself")
 @click.option('--training', is_flag=True, help="Run a training session")
 @click.option('--radar', is_flag=True, help="Show radar around the plane")
-def run(play, training, radar):
+@click.option('--headless', is_flag=True, help="Train without a game window and framerate cap")
+@click.option('--workers', default=0, help="Collect experience in K parallel headless worker processes")
+@click.option('--dashboard', is_flag=True, help="Show live training metrics")
+@click.option('--benchmark', is_flag=True, help="Run the benchmark suite")
+@click.option('--baseline', type=click.Path(exists=True), help="Benchmark results to compare with")
+@click.option('--profile', is_flag=True, help="Print time spent in every phase of the training loop")
+@click.option('--resume', is_flag=True, help="Continue training from the last checkpoint")
+@click.option('--prioritized', is_flag=True, help="Use prioritized experience replay")
+@click.option('--evaluate', 'evaluate_paths', multiple=True, type=click.Path(exists=True),
+              help="Measure the greedy policy of a saved model (can be repeated)")
+@click.option('--episodes', type=int, help="Number of seeded evaluation episodes [default: 100]")
+@click.option('--export', 'export_path', type=click.Path(exists=True),
+              help="Write TorchScript and int8 quantized versions of a saved model")
+@click.option('--serve', 'serve_path', type=click.Path(exists=True), help="Serve moves of a saved model over a socket")
+@click.option('--port', type=int, help="Localhost TCP port of the inference server [default: 5555]")
+@click.option('--unix-socket', type=click.Path(), help="Serve on a unix socket instead of TCP")
+@click.option('--frame-skip', default=1, help="Repeat every move of the training agent for K frames")
+@click.option('--record', is_flag=True, help="Append the played episodes to PlaneAI/recordings")
+@click.option('--pretrain', 'pretrain_path', type=click.Path(exists=True),
+              help="Train a new network on recorded episodes without running the game")
+@click.option('--sweep', 'sweep_path', type=click.Path(exists=True),
+              help="Run a hyperparameter search spec as headless trials in --workers processes")
+@click.option('--epochs', type=int, help="Passes over the recorded episodes in --pretrain [default: 5]")
+def run(play, training, radar, headless, workers, dashboard, benchmark, baseline, profile, resume, prioritized,
+        evaluate_paths, episodes, export_path, serve_path, port, unix_socket, frame_skip, record, pretrain_path,
+        sweep_path, epochs):
     """Play flight game or train a neural network that will 
     learn how to avoid obstacles (rockets) and collect as many 
     points as possible.
@@ -16,12 +43,74 @@ def run(play, training, radar):
     
     Play game by yourself example:
     python3 main.py --play
+    
+    Fast training without a window example:
+    python3 main.py --training --headless
+    
+    Training with 4 parallel workers example:
+    python3 main.py --training --workers 4
+    
+    Watch a running training session (in another terminal):
+    python3 main.py --dashboard
+    
+    Continue an interrupted training:
+    python3 main.py --training --resume
+    
+    Compare saved models on the same 100 seeded games:
+    python3 main.py --evaluate PlaneAI/model.pth --evaluate other.pth
+    
+    Export a model for fast CPU inference:
+    python3 main.py --export PlaneAI/model.pth
+    
+    Serve moves of a model to other processes:
+    python3 main.py --serve PlaneAI/model_traced.pt
+    
+    Record episodes and pretrain a new network on them:
+    python3 main.py --training --headless --record
+    python3 main.py --pretrain PlaneAI/recordings
+    
+    Search hyperparameters on all cores:
+    python3 main.py --sweep sweep.json
+    
+    Run benchmarks and compare them with stored results:
+    python3 main.py --benchmark --baseline benchmarks/baseline.json
     """
+    if profile:
+        profiler.enable()
+    
     if play:
+        from src.planegame import FlightGame
         game = FlightGame()
         game.run(radar)
+    elif training and workers > 0:
+        from src.distributed import train_distributed
+        train_distributed(workers, prioritized=prioritized, frame_skip=frame_skip)
     elif training:
-        train()
+        from src.agent import train
+        train(headless=headless, resume=resume, prioritized=prioritized, frame_skip=frame_skip, record_episodes=record)
+    elif pretrain_path:
+        from src.pretrain import pretrain, PRETRAIN_EPOCHS
+        pretrain(pretrain_path, epochs=epochs or PRETRAIN_EPOCHS)
+    elif sweep_path:
+        from src.sweep import run_sweep
+        run_sweep(sweep_path, processes=workers or None)
+    elif dashboard:
+        from src.chartslib.dashboard import run_dashboard
+        run_dashboard()
+    elif serve_path:
+        from src.inference_server import run_server, PORT
+        run_server(serve_path, port=port or PORT, unix_path=unix_socket)
+    elif export_path:
+        from src.deep_qlearning.export import export_model
+        if not export_model(export_path):
+            raise SystemExit(1)
+    elif evaluate_paths:
+        from src.evaluation import evaluate, EVALUATION_EPISODES
+        evaluate(list(evaluate_paths), episodes=episodes or EVALUATION_EPISODES)
+    elif benchmark:
+        from benchmarks.suite import run_suite
+        if not run_suite(baseline_path=baseline):
+            raise SystemExit(1)
 
 if __name__ == "__main__":
     run()
\ No newline at end of file
@@ -1,120 +1,226 @@
-from collections import deque
+import random
+import time
 from src.planegame import FlightGame
+from src.frame_skip import FrameSkip
 import numpy as np
-import random
 import torch 
-from src.chartslib.plot_helper import plot, histogram
+from src.chartslib.metrics import MetricsWriter
 from src.deep_qlearning.model import Linear_QNet, QTrainer
+from src.deep_qlearning.export import load_policy
+from src.deep_qlearning.replay_memory import ReplayMemory, PrioritizedReplayMemory
+from src.profiling import profiler
+from src.checkpoint import CheckpointWriter, load_checkpoint, CHECKPOINT_EVERY
+from src.episode_log import EpisodeRecorder
 
 MAX_MEMORY = 100_000
 BATCH_SIZE = 1000
 LR = 0.001
+GAMMA = 0.9
 
 STATE_SIZE = 120
+HIDDEN_SIZE = 256
+# Exploration picks one of the first EXPLORATION_MOVES moves (top-right | right | bottom-right)
+EXPLORATION_MOVES = 3
+# Epsilon is EXPLORATION_GAMES - number of games, out of 200
+EXPLORATION_GAMES = 80
 
 class Agent:
-    def __init__(self, network_dimensions: tuple):
+    def __init__(self, network_dimensions: tuple, prioritized: bool = False, lr: float = LR, gamma: float = GAMMA,
+                 batch_size: int = BATCH_SIZE, max_memory: int = MAX_MEMORY, exploration_games: int = EXPLORATION_GAMES):
         # Game number
         self.n_game = 0
         
         # Stands for randomness in exploration / exploitation phase
         self.epsilon = 0 
-        self.gamma = 0.9 # discount rate ???
-        self.memory = deque(maxlen=MAX_MEMORY) # popleft()
+        self.exploration_games = exploration_games
+        self.gamma = gamma # discount rate ???
+        self.batch_size = batch_size
+        self.state_size = network_dimensions[0]
+        # Both memories overwrite the oldest transitions when full
+        self.prioritized = prioritized
+        if self.prioritized:
+            self.memory = PrioritizedReplayMemory(max_memory, self.state_size)
+        else:
+            self.memory = ReplayMemory(max_memory, self.state_size)
         self.model = Linear_QNet(*network_dimensions)
-        self.trainer = QTrainer(self.model,lr=LR,gamma=self.gamma)       
+        self.trainer = QTrainer(self.model,lr=lr,gamma=self.gamma)       
+        # Network that picks the moves, the trained model unless
+        # an exported one is loaded with use_policy
+        self.policy = self.model
+        
+        # Random generator and buffers reused by get_actions
+        self.rng = np.random.default_rng()
+        self._states_buffer = torch.empty((0, self.state_size))
+        self._moves_buffer = torch.empty(0, dtype=torch.long)
     
     def get_state(self, game: FlightGame):
         """Returns the state of the game.
         i.e. Position of the plane and positions of all the rockets.
         """
-        state = game.radar.get_radar_states(game.enemies)
-        return np.array(state, dtype=int).flatten()
+        # uint8 array of 0s and 1s, one per radar area
+        return game.get_radar_states()
 
     def remember(self,state,action,reward,next_state,done):
-        self.memory.append((state,action,reward,next_state,done)) # popleft if memory exceed
+        self.memory.push(state,action,reward,next_state,done)
     
     def train_long_memory(self):
-        if (len(self.memory) > BATCH_SIZE):
-            mini_sample = random.sample(self.memory,BATCH_SIZE)
-        else:
-            mini_sample = self.memory
-        states,actions,rewards,next_states,dones = zip(*mini_sample)
-        self.trainer.train_step(states,actions,rewards,next_states,dones)
+        # Whole memory is used while it is smaller than the batch
+        if self.prioritized:
+            states,actions,rewards,next_states,dones,weights,indices = self.memory.sample(self.batch_size)
+            loss = self.trainer.train_step(states,actions,rewards,next_states,dones,weights)
+            self.memory.update_priorities(indices,self.trainer.td_errors)
+            return loss
+        
+        states,actions,rewards,next_states,dones = self.memory.sample(self.batch_size)
+        return self.trainer.train_step(states,actions,rewards,next_states,dones)
     
     def train_short_memory(self,state,action,reward,next_state,done):
         state = np.array(state)
         self.trainer.train_step(state,action,reward,next_state,done)
 
-    def get_action(self, state):
-        self.epsilon = 80 - self.n_game
-        # Final moves: 
-        # top-right | right | bottom-right
-        # bottom | bottom-left | left 
-        # top-left | top | stay
+    def use_policy(self, path: str):
+        """Picks moves with a saved model, e.g. a TorchScript or quantized
+        one from export_model. The trained model is not affected.
+        """
+        self.policy = load_policy(path)
+
+    def get_action(self, state) -> int:
+        """Returns the index of the move for a single state."""
+        return int(self.get_actions(np.asarray(state).reshape(1, -1))[0])
+
+    def get_actions(self, states: np.ndarray) -> np.ndarray:
+        """Returns the index of the move for every row of (N, STATE_SIZE) states.
         
-        final_move = 9*[0]
-        if(random.randint(0,200)<self.epsilon):
-            move = random.randint(0,2)
-            final_move[move] = 1
-        else:
-            state0 = torch.flatten(torch.tensor(state, dtype=torch.float))
-            prediction = self.model(state0) # predict move values by model
-            move = torch.argmax(prediction).item()
-            final_move[move] = 1
-        return final_move
+        Moves: 
+        top-right | right | bottom-right
+        bottom | bottom-left | left 
+        top-left | top | stay
+        
+        The returned array is a reused buffer, valid until the next call.
+        """
+        self.epsilon = self.exploration_games - self.n_game
+        
+        n = len(states)
+        if len(self._states_buffer) != n:
+            self._states_buffer = torch.empty((n, self.state_size))
+            self._moves_buffer = torch.empty(n, dtype=torch.long)
+        
+        with torch.inference_mode():
+            self._states_buffer.copy_(torch.from_numpy(states))
+            prediction = self.policy(self._states_buffer) # predict move values by model
+            torch.argmax(prediction, dim=1, out=self._moves_buffer)
+        moves = self._moves_buffer.numpy()
+        
+        # Epsilon-greedy exploration for every row
+        explore = self.rng.integers(0, 201, size=n) < self.epsilon
+        n_explore = np.count_nonzero(explore)
+        if n_explore:
+            moves[explore] = self.rng.integers(0, EXPLORATION_MOVES, size=n_explore)
+        return moves
     
 
-def train():
+def train(headless: bool = False, resume: bool = False, prioritized: bool = False, frame_skip: int = 1,
+          record_episodes: bool = False):
     """
     Function resposible for visual training of ML model.
     Run it to see how does AI play the game and learns from its mistakes.
+    
+    With headless=True the game is not drawn and the framerate is not capped,
+    so the training runs as fast as possible.
+    Episode stats are written to METRICS_PATH, run main.py --dashboard
+    to see them live.
+    A checkpoint is saved every CHECKPOINT_EVERY games, with resume=True
+    the training continues from the last one.
+    With prioritized=True transitions with high TD-error are replayed more often.
+    With frame_skip > 1 every move is repeated for frame_skip frames.
+    With record_episodes=True every episode is seeded and its transitions are
+    appended to RECORDINGS_PATH, see src/pretrain.py.
     """
     
-    plot_scores = []
-    plot_mean_scores = []
-    total_score = 0
     record = 0
-    network_dimensions = (STATE_SIZE, 256, 9)
+    network_dimensions = (STATE_SIZE, HIDDEN_SIZE, 9)
         
-    agent = Agent(network_dimensions)
-    game = FlightGame()
+    agent = Agent(network_dimensions, prioritized=prioritized)
+    game = FlightGame(headless=headless)
+    if frame_skip > 1:
+        game = FrameSkip(game, frame_skip)
+    metrics = MetricsWriter(append=resume)
+    checkpoints = CheckpointWriter()
         
-    plt = None
     iteration_count = 0
     MAX_ITERATIONS = 150
+    if resume:
+        counters = load_checkpoint(agent, game, metrics)
+        iteration_count = counters['iteration_count']
+        record = counters['record']
+        print('Resumed from game', agent.n_game)
+    
+    recorder = None
+    if record_episodes:
+        recorder = EpisodeRecorder(state_size=STATE_SIZE)
+        episode_seed = random.randrange(2**31)
+        game.reset(seed=episode_seed)
+    
+    game_steps = 0
+    game_start = time.perf_counter()
     while iteration_count < MAX_ITERATIONS:
         # Get old state
-        state_old = agent.get_state(game)
+        with profiler.phase('get_state'):
+            state_old = agent.get_state(game)
             
         # get move
-        final_move = agent.get_action(state_old)
+        with profiler.phase('get_action'):
+            final_move = agent.get_action(state_old)
             
         #  perform move and get the new state
-        reward, done, score = game.play_step(final_move)
-        state_new = agent.get_state(game)
+        frame = game.frame
+        with profiler.phase('play_step'):
+            reward, done, score = game.play_step(final_move)
+        game_steps += 1
+        with profiler.phase('get_state'):
+            state_new = agent.get_state(game)
             
         # train short memory
-        agent.train_short_memory(state_old,final_move,reward,state_new,done)
+        with profiler.phase('short_memory'):
+            agent.train_short_memory(state_old,final_move,reward,state_new,done)
             
         #remember
-        agent.remember(state_old,final_move,reward,state_new,done)
+        with profiler.phase('remember'):
+            agent.remember(state_old,final_move,reward,state_new,done)
+        if recorder is not None:
+            recorder.record(state_old,final_move,reward,done,frame)
             
         if done:
-            # Train long memory, plot the result
-            game.reset()
+            # Train long memory, log the result
+            if recorder is not None:
+                recorder.end_episode(episode_seed,score)
+                episode_seed = random.randrange(2**31)
+                game.reset(seed=episode_seed)
+            else:
+                game.reset()
             agent.n_game += 1
             print("training long memory")
-            agent.train_long_memory()
+            with profiler.phase('long_memory'):
+                loss = agent.train_long_memory()
             if(score > record): # new High score 
                 record = score
                 agent.model.save()
-            print('Game:',agent.n_game,'Score:',score,'Record:',record)
-                
-            plot_scores.append(score)
-            total_score+=score
-            mean_score = total_score / agent.n_game
-            plot_mean_scores.append(mean_score)
-            plot(plot_scores,plot_mean_scores)
-                
-            iteration_count += 1
\ No newline at end of file
+            steps_per_sec = game_steps / (time.perf_counter() - game_start)
+            print('Game:',agent.n_game,'Score:',score,'Record:',record,'Steps/s:',round(steps_per_sec,1))
+            
+            metrics.log_episode(score,agent.epsilon,loss,steps_per_sec)
+            profiler.report_if_due()
+            
+            iteration_count += 1
+            if iteration_count % CHECKPOINT_EVERY == 0 or iteration_count == MAX_ITERATIONS:
+                checkpoints.save(agent, game, metrics, {'iteration_count': iteration_count, 'record': record})
+            
+            game_steps = 0
+            game_start = time.perf_counter()
+    
+    checkpoints.wait()
+    metrics.close()
+    if recorder is not None:
+        recorder.close()
+    if profiler.enabled:
+        print(profiler.summary())
\ No newline at end of file
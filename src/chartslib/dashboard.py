@@ -0,0 +1,70 @@
+import json
+import os
+import time
+import matplotlib.pyplot as plt
+from src.chartslib.metrics import METRICS_PATH
+
+# Seconds between two redraws
+REFRESH_INTERVAL = 2.0
+
+def _read_rows(file) -> list:
+    """Returns rows appended to the file since the last call."""
+    rows = []
+    while True:
+        position = file.tell()
+        line = file.readline()
+        # Nothing new yet or the row is still being written
+        if not line.endswith('\n'):
+            file.seek(position)
+            return rows
+        rows.append(json.loads(line))
+
+def _restarted(file) -> bool:
+    """True if the file was truncated by a new training since the last read."""
+    return os.fstat(file.fileno()).st_size < file.tell()
+
+def run_dashboard(path: str = METRICS_PATH, refresh: float = REFRESH_INTERVAL):
+    """
+    Shows live plots of a JSONL metrics file written by MetricsWriter.
+    Runs in its own process and redraws at a fixed rate, independent
+    of the training loop. Waits until the training creates the file and
+    starts over when a new training replaces it.
+    """
+    games, scores, mean_scores, losses = [], [], [], []
+
+    while not os.path.exists(path):
+        print('Waiting for', path)
+        time.sleep(refresh)
+
+    plt.ion()
+    figure, (score_axis, loss_axis) = plt.subplots(2, 1, sharex=True)
+    with open(path) as file:
+        while plt.fignum_exists(figure.number):
+            if _restarted(file):
+                file.seek(0)
+                for values in (games, scores, mean_scores, losses):
+                    values.clear()
+            for row in _read_rows(file):
+                # A new or resumed training counts games again from an
+                # earlier number, its rows replace the plotted ones
+                while games and games[-1] >= row['game']:
+                    for values in (games, scores, mean_scores, losses):
+                        values.pop()
+                games.append(row['game'])
+                scores.append(row['score'])
+                mean_scores.append(row['mean_score'])
+                losses.append(row['loss'])
+
+            score_axis.clear()
+            score_axis.set_title("Training...")
+            score_axis.set_ylabel('Score')
+            score_axis.plot(games, scores)
+            score_axis.plot(games, mean_scores)
+            score_axis.set_ylim(ymin=0)
+
+            loss_axis.clear()
+            loss_axis.set_xlabel('Number of Games')
+            loss_axis.set_ylabel('Loss')
+            loss_axis.plot(games, losses)
+
+            plt.pause(refresh)
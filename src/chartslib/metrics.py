@@ -0,0 +1,92 @@
+import csv
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+METRICS_PATH = './PlaneAI/metrics.jsonl'
+
+FIELDS = ('game', 'score', 'mean_score', 'recent_mean_score', 'record', 'epsilon', 'loss', 'steps_per_sec', 'time')
+
+class MetricsWriter:
+    """Appends episode stats to a JSONL (or CSV for *.csv paths) file.
+
+    Rows are written by a background thread, so logging an episode never
+    waits for the disk. Only running totals and the last `window` scores
+    are kept in memory. A new training starts a new file, with append=True
+    (e.g. a resumed training) the rows are added to the existing one.
+    """
+    def __init__(self, path: str = METRICS_PATH, window: int = 100, append: bool = False):
+        self.path = path
+        self.append = append
+        self.games = 0
+        self.total_score = 0
+        self.record = 0
+        self.recent_scores = deque(maxlen=window)
+
+        self._rows = queue.Queue()
+        self._thread = threading.Thread(target=self._write_rows, daemon=True)
+        self._thread.start()
+
+    def log_episode(self, score: int, epsilon: float, loss: float, steps_per_sec: float) -> dict:
+        """Updates the aggregates and queues one row, returns the row."""
+        self.games += 1
+        self.total_score += score
+        self.record = max(self.record, score)
+        self.recent_scores.append(score)
+
+        row = {
+            'game': self.games,
+            'score': score,
+            'mean_score': self.total_score / self.games,
+            'recent_mean_score': sum(self.recent_scores) / len(self.recent_scores),
+            'record': self.record,
+            'epsilon': epsilon,
+            'loss': loss,
+            'steps_per_sec': steps_per_sec,
+            'time': time.time(),
+        }
+        self._rows.put(row)
+        return row
+
+    def get_state(self) -> dict:
+        """Returns the aggregates, e.g. to store them in a checkpoint."""
+        return {
+            'games': self.games,
+            'total_score': self.total_score,
+            'record': self.record,
+            'recent_scores': list(self.recent_scores),
+        }
+
+    def set_state(self, state: dict):
+        self.games = state['games']
+        self.total_score = state['total_score']
+        self.record = state['record']
+        self.recent_scores.clear()
+        self.recent_scores.extend(state['recent_scores'])
+
+    def _write_rows(self):
+        with open(self.path, 'a' if self.append else 'w', newline='') as file:
+            csv_writer = None
+            if self.path.endswith('.csv'):
+                csv_writer = csv.DictWriter(file, fieldnames=FIELDS)
+                if file.tell() == 0:
+                    csv_writer.writeheader()
+
+            while True:
+                row = self._rows.get()
+                if row is None:
+                    break
+                if csv_writer is not None:
+                    csv_writer.writerow(row)
+                else:
+                    file.write(json.dumps(row) + '\n')
+                # Flush once the queue is drained, not after every row
+                if self._rows.empty():
+                    file.flush()
+
+    def close(self):
+        """Writes the remaining rows and stops the writer thread."""
+        self._rows.put(None)
+        self._thread.join()
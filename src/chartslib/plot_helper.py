@@ -1,9 +1,8 @@
 import matplotlib.pyplot as plt 
 from IPython import display
 
-plt.ion()
-
 def plot(scores, mean_scores):
+    plt.ion()
     display.clear_output(wait=True)
     display.display(plt.gcf())
     plt.clf()
@@ -21,6 +20,7 @@ def plot(scores, mean_scores):
     return plt
     
 def histogram(values_list):
+    plt.ion()
     display.clear_output(wait=True)
     display.display(plt.gcf())
     plt.title("Rockets Y positions histogram")
@@ -0,0 +1,118 @@
+import copy
+import os
+import random
+import shutil
+import threading
+import numpy as np
+import torch
+
+CHECKPOINT_PATH = './PlaneAI/checkpoint'
+# A checkpoint is saved after every CHECKPOINT_EVERY games
+CHECKPOINT_EVERY = 10
+
+TRAINING_FILE = 'training.pth'
+MEMORY_FIELDS = ('states', 'actions', 'rewards', 'next_states', 'dones')
+
+class CheckpointWriter:
+    """Saves full training checkpoints from a background thread.
+
+    A checkpoint is a directory with the model, the Adam state, counters
+    and random generator states in training.pth, and every replay memory
+    field as a separate .npy file written through a memory map, so the
+    buffer is never pickled. The state is copied on the calling thread,
+    writing it to disk doesn't stall the training loop.
+    """
+    def __init__(self, path: str = CHECKPOINT_PATH):
+        self.path = path
+        self._thread = None
+
+    def save(self, agent, game, metrics, counters: dict):
+        memory = agent.memory
+        snapshot = {
+            'model': {name: tensor.detach().clone() for name, tensor in agent.model.state_dict().items()},
+            'optimizer': copy.deepcopy(agent.trainer.optimer.state_dict()),
+            'counters': dict(counters, n_game=agent.n_game),
+            'metrics': metrics.get_state(),
+            'memory': {
+                'position': memory.position,
+                'size': memory.size,
+                'rng': memory.rng.bit_generator.state,
+            },
+            'random': {
+                'python': random.getstate(),
+                'agent': agent.rng.bit_generator.state,
+                'game': game.rng.getstate(),
+                'torch': torch.get_rng_state(),
+            },
+        }
+        arrays = {field: getattr(memory, field)[:memory.size].copy() for field in MEMORY_FIELDS}
+
+        # Only one checkpoint is written at a time
+        self.wait()
+        self._thread = threading.Thread(target=self._write, args=(snapshot, arrays))
+        self._thread.start()
+
+    def _write(self, snapshot: dict, arrays: dict):
+        temporary_path = self.path + '.tmp'
+        shutil.rmtree(temporary_path, ignore_errors=True)
+        os.makedirs(temporary_path)
+
+        torch.save(snapshot, os.path.join(temporary_path, TRAINING_FILE))
+        for field, array in arrays.items():
+            mapped = np.lib.format.open_memmap(
+                os.path.join(temporary_path, field + '.npy'),
+                mode='w+', dtype=array.dtype, shape=array.shape
+            )
+            mapped[:] = array
+            mapped.flush()
+            del mapped
+
+        # Swap directories so a crash never leaves a half written checkpoint,
+        # load_checkpoint falls back to .old if it stops between the renames
+        old_path = self.path + '.old'
+        if os.path.exists(self.path):
+            # Left over if a previous write stopped before removing it
+            shutil.rmtree(old_path, ignore_errors=True)
+            os.rename(self.path, old_path)
+        os.rename(temporary_path, self.path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    def wait(self):
+        """Blocks until the checkpoint being written is on disk."""
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+def load_checkpoint(agent, game, metrics, path: str = CHECKPOINT_PATH) -> dict:
+    """Restores the state saved by CheckpointWriter and returns its counters."""
+    if not os.path.exists(os.path.join(path, TRAINING_FILE)):
+        # The writer stopped between moving the last checkpoint away and the new one in
+        if os.path.exists(os.path.join(path + '.old', TRAINING_FILE)):
+            path = path + '.old'
+        else:
+            raise FileNotFoundError(f'No checkpoint in {path}, start a training without --resume first')
+    snapshot = torch.load(os.path.join(path, TRAINING_FILE))
+
+    agent.model.load_state_dict(snapshot['model'])
+    agent.trainer.optimer.load_state_dict(snapshot['optimizer'])
+    agent.n_game = snapshot['counters']['n_game']
+    metrics.set_state(snapshot['metrics'])
+
+    memory = agent.memory
+    size = snapshot['memory']['size']
+    for field in MEMORY_FIELDS:
+        mapped = np.load(os.path.join(path, field + '.npy'), mmap_mode='r')
+        getattr(memory, field)[:size] = mapped
+    memory.size = size
+    memory.position = snapshot['memory']['position']
+    memory.rng.bit_generator.state = snapshot['memory']['rng']
+    if agent.prioritized:
+        # Priorities are not stored, loaded transitions start with the highest one
+        memory.reset_priorities()
+
+    random.setstate(snapshot['random']['python'])
+    agent.rng.bit_generator.state = snapshot['random']['agent']
+    game.rng.setstate(snapshot['random']['game'])
+    torch.set_rng_state(snapshot['random']['torch'])
+
+    return snapshot['counters']
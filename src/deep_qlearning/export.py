@@ -0,0 +1,112 @@
+import os
+import random
+import time
+import numpy as np
+import torch
+import torch.nn as nn
+from src.deep_qlearning.model import Linear_QNet
+
+MODEL_PATH = './PlaneAI/model.pth'
+# Radar states of headless games used to check that exported models pick the same moves
+CHECK_STATES = 10_000
+# Share of the check states moved at random, so the games don't only
+# follow the model's own path
+CHECK_RANDOM_MOVES = 0.2
+# Lowest share of moves an exported model has to pick like the original
+MIN_AGREEMENT = {'traced': 0.999, 'quantized': 0.98}
+LATENCY_REPEATS = 1000
+
+def exported_paths(path: str) -> tuple:
+    """Returns paths of the traced and quantized versions of the model at path."""
+    root, _ = os.path.splitext(path)
+    return root + '_traced.pt', root + '_quantized.pt'
+
+def load_policy(path: str):
+    """Loads a model for inference: TorchScript (*.pt) written by
+    export_model or Linear_QNet weights (*.pth).
+    """
+    if path.endswith('.pt'):
+        policy = torch.jit.load(path)
+        policy.eval()
+        return policy
+    return Linear_QNet.load(path)
+
+def game_states(model, count: int = CHECK_STATES, seed: int = 0) -> torch.Tensor:
+    """Returns radar states of seeded headless games played by the model,
+    with CHECK_RANDOM_MOVES of the moves picked at random.
+    """
+    # Imported here, the game is only needed to export
+    from src.planegame import FlightGame
+
+    game = FlightGame(headless=True, seed=seed)
+    moves = random.Random(seed)
+    states = np.zeros((count, model.linear1.in_features), dtype=np.float32)
+    with torch.inference_mode():
+        for idx in range(count):
+            states[idx] = game.get_radar_states()
+            if moves.random() < CHECK_RANDOM_MOVES:
+                move = moves.randint(0, 8)
+            else:
+                move = model(torch.from_numpy(states[idx:idx + 1])).argmax(dim=1).item()
+            _, done, _ = game.play_step(move)
+            if done:
+                game.reset()
+    return torch.from_numpy(states)
+
+def _latency_ms(policy, states: torch.Tensor) -> float:
+    with torch.inference_mode():
+        policy(states) # warm up
+        start = time.perf_counter()
+        for _ in range(LATENCY_REPEATS):
+            policy(states)
+    return (time.perf_counter() - start) / LATENCY_REPEATS * 1000
+
+def export_model(path: str = MODEL_PATH) -> bool:
+    """
+    Writes a TorchScript traced and an int8 dynamically quantized
+    TorchScript version of the model next to it. Loads both files back,
+    checks on radar states of headless games that they pick the same moves
+    as the original, plays one evaluation game with each file and prints
+    their latency. Returns False if a version agrees on fewer moves than
+    MIN_AGREEMENT.
+    """
+    model = Linear_QNet.load(path)
+    input_size = model.linear1.in_features
+    example = torch.zeros(1, input_size)
+
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example)
+        quantized = torch.jit.trace(
+            torch.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8),
+            example
+        )
+    traced_path, quantized_path = exported_paths(path)
+    torch.jit.save(traced, traced_path)
+    torch.jit.save(quantized, quantized_path)
+
+    # The written files are checked, loaded the same way --evaluate loads them
+    policies = {'traced': load_policy(traced_path), 'quantized': load_policy(quantized_path)}
+    states = game_states(model)
+    with torch.inference_mode():
+        moves = model(states).argmax(dim=1)
+        agreement = {
+            name: (policy(states).argmax(dim=1) == moves).float().mean().item()
+            for name, policy in policies.items()
+        }
+
+    print(f"{'model':<10} {'file':<32} {'agreement':>10} {'1 state [ms]':>13} {'64 states [ms]':>15}")
+    for name, policy, policy_path in (('original', model, path), ('traced', policies['traced'], traced_path),
+                                      ('quantized', policies['quantized'], quantized_path)):
+        print(f"{name:<10} {policy_path:<32} {agreement.get(name, 1.0):>10.2%} "
+              f"{_latency_ms(policy, states[:1]):>13.4f} {_latency_ms(policy, states[:64]):>15.4f}")
+
+    failed = [name for name, share in agreement.items() if share < MIN_AGREEMENT[name]]
+    for name in failed:
+        print(f'WARNING: {name} model picks the same move on {agreement[name]:.2%} of '
+              f'{len(states)} game states, below {MIN_AGREEMENT[name]:.1%}')
+
+    # Every file has to play a game of --evaluate (imported here, evaluation imports this module)
+    from src.evaluation import _play_episode
+    for policy_path in (traced_path, quantized_path):
+        _play_episode((policy_path, 0))
+    return not failed
@@ -19,6 +19,18 @@ class Linear_QNet(nn.Module):
         model_folder_path = './PlaneAI'
         file_name = os.path.join(model_folder_path,file_name)
         torch.save(self.state_dict(),file_name)
+    
+    @classmethod
+    def load(cls, path):
+        """Creates the network from weights written by save(),
+        layer sizes are read from the weights."""
+        state_dict = torch.load(path)
+        hidden_size, input_size = state_dict['linear1.weight'].shape
+        output_size = state_dict['linear2.weight'].shape[0]
+        model = cls(input_size,hidden_size,output_size)
+        model.load_state_dict(state_dict)
+        model.eval()
+        return model
 
 class QTrainer:
     def __init__(self,model,lr,gamma):
@@ -27,12 +39,18 @@ class QTrainer:
         self.model = model
         self.optimer = optim.Adam(model.parameters(),lr = self.lr)    
         self.criterion = nn.MSELoss()
+        # TD-errors of the last train_step, used to update replay priorities
+        self.td_errors = None
 
-    def train_step(self,state,action,reward,next_state,done):
-        state = torch.tensor(state,dtype=torch.float)
-        next_state = torch.tensor(next_state,dtype=torch.float)
-        action = torch.tensor(action,dtype=torch.long)
-        reward = torch.tensor(reward,dtype=torch.float)
+    def train_step(self,state,action,reward,next_state,done,weights=None):
+        # action is the index of the move taken (one per row for batches)
+        # weights are importance-sampling weights of prioritized replay
+        # as_tensor doesn't copy tensors sampled from ReplayMemory
+        state = torch.as_tensor(state,dtype=torch.float)
+        next_state = torch.as_tensor(next_state,dtype=torch.float)
+        action = torch.as_tensor(action,dtype=torch.long)
+        reward = torch.as_tensor(reward,dtype=torch.float)
+        done = torch.as_tensor(done,dtype=torch.float)
 
         if(len(state.shape) == 1): # only one parameter to train
             #(1 , x)
@@ -40,22 +58,29 @@ class QTrainer:
             next_state = torch.unsqueeze(next_state,0)
             action = torch.unsqueeze(action,0)
             reward = torch.unsqueeze(reward,0)
-            done = (done, )
-        
+            done = torch.unsqueeze(done,0)
         
         # 1. Predicted Q value with current state
         pred = self.model(state)
-        target = pred.clone()
-        for idx in range(len(done)):
-            Q_new = reward[idx]
-            if not done[idx]:
-                Q_new = reward[idx] + self.gamma * torch.max(self.model(next_state[idx]))
-            target[idx][torch.argmax(action).item()] = Q_new 
+        
         # 2. Q_new = reward + gamma * max(next_predicted Qvalue) -> only do this if not done
-        # pred.clone()
-        # preds[argmax(action)] = Q_new
+        # one forward pass for all next states
+        with torch.no_grad():
+            next_q = self.model(next_state).max(dim=1).values
+        Q_new = reward + self.gamma * next_q * (1 - done)
+        
+        # 3. target is pred with Q_new at the index of the taken action
+        target = pred.detach().clone()
+        target.scatter_(1, action.unsqueeze(1), Q_new.unsqueeze(1))
+        self.td_errors = (Q_new - pred.detach().gather(1, action.unsqueeze(1)).squeeze(1)).numpy()
+        
         self.optimer.zero_grad()
-        loss = self.criterion(target,pred)
+        if weights is None:
+            loss = self.criterion(target,pred)
+        else:
+            # Same as MSELoss with every row scaled by its weight
+            loss = (torch.as_tensor(weights).unsqueeze(1) * (target - pred) ** 2).mean()
         loss.backward()
 
-        self.optimer.step()
\ No newline at end of file
+        self.optimer.step()
+        return loss.item()
@@ -0,0 +1,186 @@
+import numpy as np
+import torch
+
+# Prioritized replay: how much priorities matter (0 - uniform sampling),
+# initial importance-sampling correction and its increase per sampled batch
+PER_ALPHA = 0.6
+PER_BETA = 0.4
+PER_BETA_INCREMENT = 0.001
+# Keeps transitions with zero TD-error possible to sample
+PER_EPSILON = 0.01
+
+# Bits of every byte value as float32, used to unpack states straight into floats
+_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).astype(np.float32)
+
+def pack_states(states) -> np.ndarray:
+    """Packs binary radar states, 8 cells per byte (120 cells -> 15 bytes)."""
+    return np.packbits(np.asarray(states, dtype=bool), axis=-1)
+
+def unpack_states(packed: np.ndarray, state_size: int) -> np.ndarray:
+    """Unpacks (N, packed bytes) states into an (N, state_size) float32 batch."""
+    return _BITS[packed].reshape(len(packed), -1)[:, :state_size]
+
+class ReplayMemory:
+    """Fixed size ring buffer of transitions.
+
+    Every field is kept in one preallocated, contiguous NumPy array, so
+    storing a transition is a few array writes and sampling a batch is one
+    fancy-index per field. Binary radar states are stored bit-packed, so
+    a transition takes 36 bytes. Oldest transitions are overwritten when
+    the memory is full.
+    """
+    def __init__(self, capacity: int, state_size: int, seed: int = None):
+        self.capacity = capacity
+        self.state_size = state_size
+        self.position = 0
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+
+        packed_size = (state_size + 7) // 8
+        self.states = np.zeros((capacity, packed_size), dtype=np.uint8)
+        self.actions = np.zeros(capacity, dtype=np.int8)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, packed_size), dtype=np.uint8)
+        self.dones = np.zeros(capacity, dtype=bool)
+
+    def __len__(self):
+        return self.size
+
+    def push(self, state, action: int, reward: float, next_state, done: bool):
+        """Stores one transition, action is the index of the move taken."""
+        idx = self.position
+        self.states[idx] = pack_states(state)
+        self.actions[idx] = action
+        self.rewards[idx] = reward
+        self.next_states[idx] = pack_states(next_state)
+        self.dones[idx] = done
+
+        self.position = (idx + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        """Stores transitions of many games at once (e.g. from VecFlightEnv)."""
+        n = len(actions)
+        indices = (self.position + np.arange(n)) % self.capacity
+        self.states[indices] = pack_states(states)
+        self.actions[indices] = actions
+        self.rewards[indices] = rewards
+        self.next_states[indices] = pack_states(next_states)
+        self.dones[indices] = dones
+
+        self.position = (self.position + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    def sample(self, batch_size: int):
+        """Returns up to batch_size distinct random transitions as tensors."""
+        indices = self.rng.choice(self.size, size=min(batch_size, self.size), replace=False)
+        return self.get(indices)
+
+    def get(self, indices):
+        """Returns states, actions, rewards, next_states and dones at given
+        indices, states unpacked to float32. Tensors share memory with the
+        gathered arrays (no copies).
+        """
+        return (
+            torch.from_numpy(unpack_states(self.states[indices], self.state_size)),
+            torch.from_numpy(self.actions[indices]),
+            torch.from_numpy(self.rewards[indices]),
+            torch.from_numpy(unpack_states(self.next_states[indices], self.state_size)),
+            torch.from_numpy(self.dones[indices]),
+        )
+
+class SumTree:
+    """Binary tree where every node holds the sum of its children.
+
+    Leaves hold priorities, so a leaf can be drawn with probability
+    proportional to its priority in O(log n). Updates and draws of whole
+    batches walk the tree one level at a time for all items together.
+    """
+    def __init__(self, capacity: int):
+        # Leaves are kept at [leaves_start, 2*leaves_start)
+        self.leaves_start = 1
+        while self.leaves_start < capacity:
+            self.leaves_start *= 2
+        self.nodes = np.zeros(2 * self.leaves_start, dtype=np.float64)
+
+    @property
+    def total(self) -> float:
+        return self.nodes[1]
+
+    def get(self, indices) -> np.ndarray:
+        return self.nodes[self.leaves_start + np.asarray(indices)]
+
+    def update(self, indices, priorities):
+        nodes = self.leaves_start + np.asarray(indices, dtype=np.int64)
+        if len(nodes) == 0:
+            return
+        self.nodes[nodes] = priorities
+        nodes = np.unique(nodes // 2)
+        while nodes[0] >= 1:
+            self.nodes[nodes] = self.nodes[2 * nodes] + self.nodes[2 * nodes + 1]
+            if nodes[0] == 1:
+                break
+            nodes = np.unique(nodes // 2)
+
+    def find(self, values: np.ndarray) -> np.ndarray:
+        """Returns leaf indices where the cumulative priority reaches values."""
+        values = values.copy()
+        nodes = np.ones(len(values), dtype=np.int64)
+        while nodes[0] < self.leaves_start:
+            left = 2 * nodes
+            go_right = values > self.nodes[left]
+            values -= self.nodes[left] * go_right
+            nodes = left + go_right
+        return nodes - self.leaves_start
+
+class PrioritizedReplayMemory(ReplayMemory):
+    """Replay memory sampling transitions proportionally to their TD-error.
+
+    New transitions get the highest priority seen so far. sample() also
+    returns importance-sampling weights and the sampled indices, which are
+    passed back to update_priorities() with the new TD-errors.
+    """
+    def __init__(self, capacity: int, state_size: int, seed: int = None,
+                 alpha: float = PER_ALPHA, beta: float = PER_BETA):
+        super().__init__(capacity, state_size, seed)
+        self.alpha = alpha
+        self.beta = beta
+        self.max_priority = 1.0
+        self.tree = SumTree(capacity)
+
+    def push(self, state, action: int, reward: float, next_state, done: bool):
+        idx = self.position
+        super().push(state, action, reward, next_state, done)
+        self.tree.update([idx], self.max_priority ** self.alpha)
+
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        indices = (self.position + np.arange(len(actions))) % self.capacity
+        super().push_batch(states, actions, rewards, next_states, dones)
+        self.tree.update(indices, self.max_priority ** self.alpha)
+
+    def sample(self, batch_size: int):
+        """Returns states, actions, rewards, next_states, dones, weights and indices."""
+        batch_size = min(batch_size, self.size)
+
+        # One draw from every of batch_size equal segments of the total priority
+        segment = self.tree.total / batch_size
+        values = (np.arange(batch_size) + self.rng.random(batch_size)) * segment
+        indices = np.minimum(self.tree.find(values), self.size - 1)
+
+        probabilities = self.tree.get(indices) / self.tree.total
+        weights = (self.size * probabilities) ** -self.beta
+        weights = (weights / weights.max()).astype(np.float32)
+        self.beta = min(1.0, self.beta + PER_BETA_INCREMENT)
+
+        return (*self.get(indices), torch.from_numpy(weights), indices)
+
+    def update_priorities(self, indices, td_errors):
+        priorities = np.abs(td_errors) + PER_EPSILON
+        self.max_priority = max(self.max_priority, priorities.max())
+        self.tree.update(indices, priorities ** self.alpha)
+
+    def reset_priorities(self):
+        """Gives every stored transition the highest priority, e.g. after
+        the transitions were loaded from a checkpoint.
+        """
+        self.tree.update(np.arange(self.size), self.max_priority ** self.alpha)
@@ -0,0 +1,156 @@
+import queue
+import time
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from src.agent import Agent, STATE_SIZE, HIDDEN_SIZE
+from src.planegame import FlightGame
+from src.frame_skip import FrameSkip
+from src.deep_qlearning.model import Linear_QNet
+from src.chartslib.metrics import MetricsWriter
+
+# Transitions are sent to the learner in chunks of this size
+CHUNK_SIZE = 200
+# Learner shares its weights with the actors every SYNC_EVERY updates
+SYNC_EVERY = 10
+
+def _put(q, item, stop):
+    """Puts item on the queue unless training was stopped in the meantime."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=1)
+            return
+        except queue.Full:
+            continue
+
+def _actor(worker_id, network_dimensions, shared_model, weights_version, weights_lock,
+           transitions, episodes, stop, seed, frame_skip):
+    """Plays headless games with a local copy of the model and sends
+    transitions and episode scores to the learner.
+    """
+    torch.set_num_threads(1)
+    # Don't block the process exit on data that the learner won't read anymore
+    transitions.cancel_join_thread()
+    episodes.cancel_join_thread()
+
+    agent = Agent(network_dimensions)
+    with weights_lock:
+        agent.model.load_state_dict(shared_model.state_dict())
+        version = weights_version.value
+    game = FlightGame(headless=True, seed=seed)
+    if frame_skip > 1:
+        game = FrameSkip(game, frame_skip)
+
+    states = np.zeros((CHUNK_SIZE, STATE_SIZE), dtype=np.uint8)
+    actions = np.zeros(CHUNK_SIZE, dtype=np.int8)
+    rewards = np.zeros(CHUNK_SIZE, dtype=np.float32)
+    next_states = np.zeros((CHUNK_SIZE, STATE_SIZE), dtype=np.uint8)
+    dones = np.zeros(CHUNK_SIZE, dtype=bool)
+    count = 0
+
+    while not stop.is_set():
+        state_old = agent.get_state(game)
+        final_move = agent.get_action(state_old)
+        reward, done, score = game.play_step(final_move)
+        state_new = agent.get_state(game)
+
+        states[count] = state_old
+        actions[count] = final_move
+        rewards[count] = reward
+        next_states[count] = state_new
+        dones[count] = done
+        count += 1
+
+        if count == CHUNK_SIZE:
+            # Tensors are moved to shared memory instead of being pickled
+            chunk = tuple(torch.from_numpy(a.copy()) for a in (states, actions, rewards, next_states, dones))
+            _put(transitions, chunk, stop)
+            count = 0
+
+        if done:
+            game.reset()
+            agent.n_game += 1
+            _put(episodes, (worker_id, score, agent.epsilon), stop)
+
+        # Pick up new weights from the learner
+        if weights_version.value != version:
+            with weights_lock:
+                agent.model.load_state_dict(shared_model.state_dict())
+                version = weights_version.value
+
+def train_distributed(workers: int, max_games: int = 150, prioritized: bool = False, frame_skip: int = 1):
+    """
+    Trains the model with experience collected by parallel actor processes.
+    Every worker plays its own headless game and sends transitions
+    to this process, which owns the trainer and the replay memory and
+    shares new weights with the workers every SYNC_EVERY updates.
+    """
+    ctx = mp.get_context("spawn")
+    network_dimensions = (STATE_SIZE, HIDDEN_SIZE, 9)
+
+    agent = Agent(network_dimensions, prioritized=prioritized)
+    shared_model = Linear_QNet(*network_dimensions)
+    shared_model.load_state_dict(agent.model.state_dict())
+    shared_model.share_memory()
+    weights_version = ctx.Value('i', 0)
+    weights_lock = ctx.Lock()
+
+    transitions = ctx.Queue(maxsize=4*workers)
+    episodes = ctx.Queue()
+    stop = ctx.Event()
+
+    actors = [
+        ctx.Process(
+            target=_actor,
+            args=(worker_id, network_dimensions, shared_model, weights_version, weights_lock,
+                  transitions, episodes, stop, worker_id, frame_skip),
+            daemon=True,
+        )
+        for worker_id in range(workers)
+    ]
+    for actor in actors:
+        actor.start()
+
+    metrics = MetricsWriter()
+    record = 0
+    loss = None
+    updates = 0
+    steps = 0
+    start = time.perf_counter()
+    try:
+        while agent.n_game < max_games:
+            try:
+                chunk = transitions.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            agent.memory.push_batch(*(t.numpy() for t in chunk))
+            steps += len(chunk[1])
+            loss = agent.train_long_memory()
+            updates += 1
+
+            if updates % SYNC_EVERY == 0:
+                with weights_lock:
+                    shared_model.load_state_dict(agent.model.state_dict())
+                    weights_version.value += 1
+
+            while True:
+                try:
+                    worker_id, score, epsilon = episodes.get_nowait()
+                except queue.Empty:
+                    break
+                agent.n_game += 1
+                if(score > record): # new High score
+                    record = score
+                    agent.model.save()
+                steps_per_sec = steps / (time.perf_counter() - start)
+                row = metrics.log_episode(score,epsilon,loss,steps_per_sec)
+                print('Game:',agent.n_game,'Worker:',worker_id,'Score:',score,'Record:',record,
+                      'Mean:',round(row['mean_score'],2),'Steps/s:',round(steps_per_sec,1))
+    finally:
+        metrics.close()
+        stop.set()
+        for actor in actors:
+            actor.join(timeout=5)
+            if actor.is_alive():
+                actor.terminate()
@@ -0,0 +1,139 @@
+import json
+import os
+import numpy as np
+import torch
+from src.deep_qlearning.replay_memory import pack_states, unpack_states
+
+RECORDINGS_PATH = './PlaneAI/recordings'
+TRANSITIONS_FILE = 'transitions.bin'
+INDEX_FILE = 'index.bin'
+META_FILE = 'meta.json'
+
+# One row of the index per finished episode
+EPISODE_DTYPE = np.dtype([
+    ('start', np.int64),
+    ('length', np.int64),
+    ('seed', np.int64),
+    ('score', np.int64),
+])
+
+def transition_dtype(state_size: int) -> np.dtype:
+    """Record of one step: bit-packed radar state, index of the move,
+    reward, game over flag and the frame the state was seen at.
+    The next state is the state of the following record.
+    """
+    return np.dtype([
+        ('state', np.uint8, ((state_size + 7) // 8,)),
+        ('action', np.int8),
+        ('reward', np.float32),
+        ('done', bool),
+        ('frame', np.uint32),
+    ])
+
+class EpisodeRecorder:
+    """Appends played episodes to a directory of raw binary files.
+
+    transitions.bin holds fixed size transition records, index.bin one
+    EPISODE_DTYPE row per episode. Steps are kept in memory until the
+    episode ends, then its records and its index row are appended, so a
+    crash never leaves a half written episode in the index. Later sessions
+    append to the same files.
+    """
+    def __init__(self, path: str = RECORDINGS_PATH, state_size: int = 120):
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as file:
+                recorded_size = json.load(file)['state_size']
+            if recorded_size != state_size:
+                raise ValueError(f'{path} holds states of size {recorded_size}, not {state_size}')
+        else:
+            with open(meta_path, 'w') as file:
+                json.dump({'state_size': state_size}, file)
+
+        self.dtype = transition_dtype(state_size)
+        index_path = os.path.join(path, INDEX_FILE)
+        index = np.fromfile(index_path, dtype=EPISODE_DTYPE) if os.path.exists(index_path) else []
+        # Records behind the last indexed episode (e.g. from a crash) are overwritten
+        self.position = int(index[-1]['start'] + index[-1]['length']) if len(index) else 0
+        self.episodes = len(index)
+
+        transitions_path = os.path.join(path, TRANSITIONS_FILE)
+        self._transitions = open(transitions_path, 'r+b' if os.path.exists(transitions_path) else 'wb')
+        self._transitions.truncate(self.position * self.dtype.itemsize)
+        self._transitions.seek(0, os.SEEK_END)
+        self._index = open(index_path, 'ab')
+
+        self._buffer = np.zeros(1024, dtype=self.dtype)
+        self._count = 0
+
+    def record(self, state, action: int, reward: float, done: bool, frame: int):
+        if self._count == len(self._buffer):
+            self._buffer = np.concatenate([self._buffer, np.zeros_like(self._buffer)])
+        idx = self._count
+        self._buffer['state'][idx] = pack_states(state)
+        self._buffer['action'][idx] = action
+        self._buffer['reward'][idx] = reward
+        self._buffer['done'][idx] = done
+        self._buffer['frame'][idx] = frame
+        self._count += 1
+
+    def end_episode(self, seed: int, score: int):
+        """Appends the recorded steps of the finished episode."""
+        self._transitions.write(self._buffer[:self._count].tobytes())
+        self._transitions.flush()
+        episode = np.array([(self.position, self._count, seed, score)], dtype=EPISODE_DTYPE)
+        self._index.write(episode.tobytes())
+        self._index.flush()
+
+        self.position += self._count
+        self.episodes += 1
+        self._count = 0
+
+    def close(self):
+        """Closes the files, steps of an unfinished episode are dropped."""
+        self._transitions.close()
+        self._index.close()
+
+class EpisodeLog:
+    """Read-only view of episodes written by EpisodeRecorder.
+
+    Transitions are memory-mapped, so logs larger than the RAM can be
+    read and only the sampled records are loaded from disk.
+    """
+    def __init__(self, path: str = RECORDINGS_PATH):
+        with open(os.path.join(path, META_FILE)) as file:
+            self.state_size = json.load(file)['state_size']
+        self.episodes = np.fromfile(os.path.join(path, INDEX_FILE), dtype=EPISODE_DTYPE)
+        if not len(self.episodes):
+            raise ValueError(f'{path} has no recorded episodes')
+        size = int(self.episodes[-1]['start'] + self.episodes[-1]['length'])
+        self.transitions = np.memmap(os.path.join(path, TRANSITIONS_FILE),
+                                     dtype=transition_dtype(self.state_size), mode='r', shape=(size,))
+
+    def __len__(self):
+        return len(self.transitions)
+
+    def get(self, indices):
+        """Returns states, actions, rewards, next_states and dones at given
+        indices as tensors, in the same layout as ReplayMemory.get.
+        """
+        # Reading in file order is faster on a memory map
+        indices = np.sort(indices)
+        records = self.transitions[indices]
+        # Every episode ends with a done step, so the next record is the next
+        # state of the same game (and the next state of a done step is not used)
+        next_records = self.transitions[np.minimum(indices + 1, len(self) - 1)]
+        return (
+            torch.from_numpy(unpack_states(records['state'], self.state_size)),
+            torch.from_numpy(records['action'].copy()),
+            torch.from_numpy(records['reward'].copy()),
+            torch.from_numpy(unpack_states(next_records['state'], self.state_size)),
+            torch.from_numpy(records['done'].copy()),
+        )
+
+    def batches(self, batch_size: int, rng: np.random.Generator):
+        """Yields every transition once, in random batches of batch_size."""
+        order = rng.permutation(len(self))
+        for start in range(0, len(order), batch_size):
+            yield self.get(order[start:start + batch_size])
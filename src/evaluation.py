@@ -0,0 +1,75 @@
+import multiprocessing as mp
+import time
+import numpy as np
+import torch
+from src.planegame import FlightGame
+from src.deep_qlearning.export import load_policy
+
+EVALUATION_EPISODES = 100
+# Episodes of a policy that never crashes are stopped after this many steps
+MAX_EPISODE_STEPS = 20_000
+
+# Models loaded by the current worker process, by path
+_models = {}
+
+def _init_worker():
+    torch.set_num_threads(1)
+
+def _play_episode(task: tuple) -> tuple:
+    """Plays one headless game with the greedy policy of the model.
+    Returns path, seed, score, number of steps and time in seconds.
+    """
+    path, seed = task
+    model = _models.get(path)
+    if model is None:
+        model = _models[path] = load_policy(path)
+
+    game = FlightGame(headless=True, seed=seed)
+    start = time.perf_counter()
+    steps = 0
+    done = False
+    score = 0
+    with torch.inference_mode():
+        while not done and steps < MAX_EPISODE_STEPS:
+            # Batch of one state, quantized models don't take 1-D inputs
+            state = torch.from_numpy(game.get_radar_states()).float().unsqueeze(0)
+            move = model(state).argmax(dim=1).item()
+            _, done, score = game.play_step(move)
+            steps += 1
+    return path, seed, score, steps, time.perf_counter() - start
+
+def evaluate(paths: list, episodes: int = EVALUATION_EPISODES, processes: int = None, seed: int = 0) -> dict:
+    """
+    Runs the greedy policy of every saved model over the same seeded
+    episodes in a pool of headless games and prints score, episode length
+    and speed statistics. Returns the statistics by path.
+    """
+    tasks = [(path, seed + episode) for path in paths for episode in range(episodes)]
+    results = {path: [] for path in paths}
+
+    start = time.perf_counter()
+    with mp.get_context("spawn").Pool(processes, initializer=_init_worker) as pool:
+        for path, _, score, steps, seconds in pool.imap_unordered(_play_episode, tasks, chunksize=4):
+            results[path].append((score, steps, seconds))
+    wall_time = time.perf_counter() - start
+
+    stats = {}
+    for path, episode_results in results.items():
+        scores, lengths, seconds = (np.array(values) for values in zip(*episode_results))
+        stats[path] = {
+            'mean_score': scores.mean(),
+            'median_score': np.median(scores),
+            'p95_score': np.percentile(scores, 95),
+            'mean_length': lengths.mean(),
+            'steps_per_sec': lengths.sum() / seconds.sum(),
+        }
+
+    print(f"{'model':<30} {'mean':>8} {'median':>8} {'p95':>8} {'length':>9} {'steps/s':>9}")
+    for path, path_stats in stats.items():
+        print(f"{path:<30} {path_stats['mean_score']:>8.2f} {path_stats['median_score']:>8.1f} "
+              f"{path_stats['p95_score']:>8.1f} {path_stats['mean_length']:>9.1f} {path_stats['steps_per_sec']:>9.1f}")
+    total_steps = sum(steps for episode_results in results.values() for _, steps, _ in episode_results)
+    print('Episodes:', len(tasks), 'Seeds:', f'{seed}-{seed + episodes - 1}',
+          'Total steps/s:', round(total_steps / wall_time, 1))
+
+    return stats
@@ -0,0 +1,25 @@
+from src.planegame import FlightGame
+
+class FrameSkip:
+    """Repeats every action for `frames` frames of the wrapped game.
+
+    play_step sums the rewards of the repeated frames and stops early when
+    the game is over, so the agent picks a move, gets a state and trains
+    once per `frames` simulated frames. Everything else is forwarded to the
+    wrapped game.
+    """
+    def __init__(self, game: FlightGame, frames: int):
+        self.game = game
+        self.frames = frames
+
+    def __getattr__(self, name):
+        return getattr(self.game, name)
+
+    def play_step(self, action):
+        total_reward = 0
+        for _ in range(self.frames):
+            reward, game_over, score = self.game.play_step(action)
+            total_reward += reward
+            if game_over:
+                break
+        return total_reward, game_over, score
@@ -0,0 +1,43 @@
+import pygame
+from pygame.locals import RLEACCEL
+from .config import PLAYER_SIZE, ENEMY_SIZE, CLOUD_SIZE
+
+# Path, colorkey and size of every sprite image
+IMAGES = {
+    "jet": ("images/jet.png", (255, 255, 255), PLAYER_SIZE),
+    "missle": ("images/missle.png", (255, 255, 255), ENEMY_SIZE),
+    "cloud": ("images/cloud.png", (0, 0, 0), CLOUD_SIZE),
+}
+
+# Surfaces shared by all sprites of this process
+_surfaces = {}
+_headless = False
+
+def set_headless(headless: bool):
+    """In headless mode images are never loaded and sprites get no surface."""
+    global _headless
+    _headless = headless
+
+def get_surface(name: str):
+    """Returns the shared surface of the image, or None in headless mode.
+    
+    The image is loaded and converted once, on first use, so the display
+    mode must already be set.
+    """
+    if _headless:
+        return None
+    
+    surface = _surfaces.get(name)
+    if surface is None:
+        path, colorkey, _ = IMAGES[name]
+        surface = pygame.image.load(path).convert()
+        surface.set_colorkey(colorkey, RLEACCEL)
+        _surfaces[name] = surface
+    return surface
+
+def get_rect(name: str, **position) -> pygame.Rect:
+    """Returns a rect with the size of the image, e.g. get_rect("jet", center=(x, y))."""
+    rect = pygame.Rect((0, 0), IMAGES[name][2])
+    for attribute, value in position.items():
+        setattr(rect, attribute, value)
+    return rect
@@ -5,6 +5,21 @@ SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 RADAR_SIZE = 5
 SPEED = 40
+# Sky blue
+BACKGROUND_COLOR = (135, 206, 250)
+
+# Spawn intervals in simulated frames (250 ms and 1 s at SPEED frames per second)
+ENEMY_SPAWN_FRAMES = 10
+CLOUD_SPAWN_FRAMES = 40
+
+# Sizes of images/jet.png, images/missle.png and images/cloud.png
+PLAYER_SIZE = (62, 25)
+ENEMY_SIZE = (20, 10)
+CLOUD_SIZE = (100, 75)
+ENEMY_SPEED_RANGE = (5, 20)
+
+# Width and height of the cells of the grid indexing rockets
+GRID_CELL_SIZE = (100, 50)
 
 RectObjectCoordinates = namedtuple('RectObjectCoordinates','left,right,top,bottom')
 PlaneData = namedtuple('PlaneData', 'left, top, width, height')
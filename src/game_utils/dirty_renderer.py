@@ -0,0 +1,75 @@
+import pygame
+from .config import BACKGROUND_COLOR
+
+class DirtyRectRenderer:
+    """Redraws only the parts of the screen that changed since the last frame.
+
+    Every frame the rects of sprites that moved, appeared or disappeared and
+    of radar cells that changed color are collected. Only these regions are
+    cleared and redrawn (radar first, sprites on top) and passed to
+    pygame.display.update, instead of filling and flipping the whole screen.
+    When the plane moves, the old and new radar bounds are redrawn as two
+    regions instead of one per cell.
+    """
+    def __init__(self, screen: pygame.Surface, background: tuple = BACKGROUND_COLOR):
+        self.screen = screen
+        self.background = background
+        # Surface and rect of everything drawn in the last frame
+        self._sprites = {}
+        self._cells = []
+        self._radar_bounds = None
+        self._full_redraw = True
+
+    def invalidate(self):
+        """Makes the next frame redraw the whole screen, e.g. after a reset."""
+        self._full_redraw = True
+
+    def _sprite_regions(self, sprites: dict) -> list:
+        regions = []
+        for sprite, (surface, rect) in self._sprites.items():
+            drawn = sprites.get(sprite)
+            if drawn is None or drawn[0] is not surface or drawn[1] != rect:
+                regions.append(rect)
+        for sprite, (surface, rect) in sprites.items():
+            drawn = self._sprites.get(sprite)
+            if drawn is None or drawn[0] is not surface or drawn[1] != rect:
+                regions.append(rect)
+        return regions
+
+    def _radar_regions(self, cells: list, bounds: pygame.Rect) -> list:
+        if bounds is None or self._radar_bounds is None or bounds != self._radar_bounds:
+            return [rect for rect in (self._radar_bounds, bounds) if rect is not None]
+        return [rect for (surface, rect), (drawn_surface, _) in zip(cells, self._cells) if surface is not drawn_surface]
+
+    def draw(self, sprites, radar=None) -> list:
+        """Draws the changes of sprites (objects with surf and rect) and of
+        the radar, if given, and returns the updated regions of the screen.
+        """
+        current_sprites = {sprite: (sprite.surf, sprite.rect.copy()) for sprite in sprites}
+        cells = []
+        bounds = None
+        if radar is not None:
+            cells = [(area.surface, area.radar_rect.copy()) for area in radar.radar_areas]
+            bounds = radar.bounds.copy()
+
+        if self._full_redraw:
+            regions = [self.screen.get_rect()]
+            self._full_redraw = False
+        else:
+            regions = self._sprite_regions(current_sprites) + self._radar_regions(cells, bounds)
+
+        layers = cells + list(current_sprites.values())
+        rects = [rect for _, rect in layers]
+        # Every region is cleared and fully redrawn on its own, so
+        # overlapping regions never blend translucent cells twice
+        for region in regions:
+            self.screen.set_clip(region)
+            self.screen.fill(self.background, region)
+            for index in region.collidelistall(rects):
+                self.screen.blit(*layers[index])
+        self.screen.set_clip(None)
+
+        self._sprites = current_sprites
+        self._cells = cells
+        self._radar_bounds = bounds
+        return regions
@@ -1,9 +1,11 @@
 import pygame
 import random
-from .config import SCREEN_HEIGHT, SCREEN_WIDTH, RectObjectCoordinates, PlaneData, RADAR_SIZE
+import numpy as np
+from . import assets
+from .config import SCREEN_HEIGHT, SCREEN_WIDTH, RectObjectCoordinates, PlaneData, RADAR_SIZE, ENEMY_SPEED_RANGE
+from .config import GRID_CELL_SIZE
 from enum import Enum
 from pygame.locals import (
-    RLEACCEL,
     K_UP,
     K_DOWN,
     K_LEFT,
@@ -24,15 +26,102 @@ class Direction(Enum):
 RADAR_RED = (255, 0, 0, 80)
 RADAR_GREEN = (0, 255, 0, 80)
 
+# Translucent radar cell surfaces by color and size
+_radar_cell_surfaces = {}
+
+def radar_cell_surface(color: tuple, size: tuple) -> pygame.Surface:
+    """Returns the shared surface of a radar cell, built on first use.
+    Painting an area only swaps the surface it points to.
+    """
+    surface = _radar_cell_surfaces.get((color, size))
+    if surface is None:
+        surface = pygame.Surface(size, pygame.SRCALPHA)
+        surface.fill(color)
+        _radar_cell_surfaces[(color, size)] = surface
+    return surface
+
+def rects_to_array(sprites) -> np.ndarray:
+    """Returns rects of given sprites as one (n, 4) array of
+    left, top, right and bottom coordinates.
+    """
+    return np.array(
+        [(s.rect.left, s.rect.top, s.rect.right, s.rect.bottom) for s in sprites],
+        dtype=np.int32
+    ).reshape(-1, 4)
+
+def radar_offsets(size: int, width: int, height: int) -> np.ndarray:
+    """Returns (n, 2) array of left and top offsets of the radar areas
+    from the plane position, row by row, skipping the area taken by the plane.
+    """
+    rows, columns = np.divmod(np.arange((2*size+1)**2), 2*size+1)
+    not_plane = (rows != size) | (columns != size)
+    return np.stack((
+        (columns[not_plane] - size) * width,
+        (rows[not_plane] - size) * height,
+    ), axis=1).astype(np.int32)
+
+class RocketGrid:
+    """Uniform grid that buckets sprites by the cells their rect overlaps.
+    
+    Rect queries only look at sprites in the cells the rect overlaps, so
+    their cost doesn't grow with the total number of rockets. Sprites have to
+    call move() after changing their rect and remove() when they are killed.
+    """
+    def __init__(self, cell_size: tuple = GRID_CELL_SIZE):
+        self.cell_width, self.cell_height = cell_size
+        self.cells = {}
+        self.sprite_cells = {}
+    
+    def __len__(self):
+        return len(self.sprite_cells)
+    
+    def _cells_of(self, rect: pygame.Rect) -> tuple:
+        columns = range(rect.left // self.cell_width, (rect.right - 1) // self.cell_width + 1)
+        rows = range(rect.top // self.cell_height, (rect.bottom - 1) // self.cell_height + 1)
+        return tuple((column, row) for row in rows for column in columns)
+    
+    def add(self, sprite: pygame.sprite.Sprite):
+        cells = self._cells_of(sprite.rect)
+        for cell in cells:
+            self.cells.setdefault(cell, set()).add(sprite)
+        self.sprite_cells[sprite] = cells
+    
+    def remove(self, sprite: pygame.sprite.Sprite):
+        for cell in self.sprite_cells.pop(sprite, ()):
+            bucket = self.cells[cell]
+            bucket.discard(sprite)
+            if not bucket:
+                del self.cells[cell]
+    
+    def move(self, sprite: pygame.sprite.Sprite):
+        # Rockets usually stay in the same cells for several frames
+        if self._cells_of(sprite.rect) != self.sprite_cells.get(sprite):
+            self.remove(sprite)
+            self.add(sprite)
+    
+    def near(self, rect: pygame.Rect) -> set:
+        """Returns sprites from the cells the rect overlaps."""
+        sprites = set()
+        for cell in self._cells_of(rect):
+            sprites.update(self.cells.get(cell, ()))
+        return sprites
+    
+    def collide(self, rect: pygame.Rect) -> bool:
+        """Same as pygame.sprite.spritecollideany for all indexed sprites."""
+        return any(rect.colliderect(sprite.rect) for sprite in self.near(rect))
+
 class RadarRectangle:
-    def __init__(self, left: int, top: int, width: int, height: int):
+    def __init__(self, left: int, top: int, width: int, height: int, render: bool = True):
         self.left = left
         self.top = top
         self.width = width
         self.height = height
         self.background_color = RADAR_RED
         
-        self.surface = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+        # Surfaces are only needed when the radar is drawn on the screen,
+        # all areas share the two cached cell surfaces
+        self.render = render
+        self.surface = radar_cell_surface(self.background_color, (self.width, self.height)) if render else None
         
         self.radar_rect = pygame.Rect(
             self.left,
@@ -41,73 +130,156 @@ class RadarRectangle:
             self.height
         )
         
-        self.surface.fill(self.background_color)
-        
     def check_collisions(self, enemies: list):
         return any((self.radar_rect.colliderect(enemy) for enemy in enemies))
     
+    def move_to(self, left: int, top: int):
+        self.left = left
+        self.top = top
+        self.radar_rect.topleft = (left, top)
+    
+    def paint(self, rocket_in_area: bool):
+        self.background_color = RADAR_GREEN if rocket_in_area else RADAR_RED
+        if self.render:
+            self.surface = radar_cell_surface(self.background_color, (self.width, self.height))
+    
     def paint_area(self, enemies: list):
-        self.background_color = RADAR_GREEN if self.check_collisions(enemies) else RADAR_RED
-        self.surface.fill(self.background_color)
+        self.paint(self.check_collisions(enemies))
 
 class PlaneRadar:
-    def __init__(self, size: int, plane_data: PlaneData):
+    """Grid of (2*size+1)^2 - 1 areas around the plane.
+    
+    Areas are kept as one array of rects, so the state of the whole radar
+    is computed with a single vectorized overlap test. RadarRectangle objects
+    (and their surfaces) are only created when the radar is rendered.
+    """
+    def __init__(self, size: int, plane_data: PlaneData, render: bool = True):
         self.size = size
+        self.render = render
         self.radar_areas = []
         
-        # Go top-left by the amount of the size times the plane dimentions
-        start_left = plane_data.left - size * plane_data.width 
-        start_top = plane_data.top - size * plane_data.height
+        self.offsets = radar_offsets(size, plane_data.width, plane_data.height)
         
-        for row in range(2*self.size+1):
-            for column in range(2*self.size+1):
-                current_left = start_left + column*plane_data.width
-                current_top = start_top + row*plane_data.height
-                
-                # If arrived to plane position, continue
-                if current_left == plane_data.left and current_top == plane_data.top:
-                    continue
-                
-                radar_area = RadarRectangle(
-                    left=current_left,
-                    top=current_top,
-                    width=plane_data.width,
-                    height=plane_data.height)
-                
-                self.radar_areas.append(radar_area)
-    
-    def get_radar_states(self, enemies: list):
-        state = []
-        for area in self.radar_areas:
-            rocket_in_area = 1 if area.check_collisions(enemies) else 0
-            state.append(rocket_in_area)
+        self.width = plane_data.width
+        self.height = plane_data.height
+        self.areas = np.empty((len(self.offsets), 4), dtype=np.int32)
         
-        return state
+        if self.render:
+            self.radar_areas = [
+                RadarRectangle(left=0, top=0, width=self.width, height=self.height)
+                for _ in range(len(self.offsets))
+            ]
+        
+        self.move_to(plane_data)
+    
+    def move_to(self, plane_data: PlaneData):
+        """Moves the radar areas along with the plane."""
+        self.bounds = pygame.Rect(
+            plane_data.left - self.size * self.width,
+            plane_data.top - self.size * self.height,
+            (2*self.size+1) * self.width,
+            (2*self.size+1) * self.height,
+        )
+        self.areas[:, 0] = plane_data.left + self.offsets[:, 0]
+        self.areas[:, 1] = plane_data.top + self.offsets[:, 1]
+        self.areas[:, 2] = self.areas[:, 0] + self.width
+        self.areas[:, 3] = self.areas[:, 1] + self.height
+        
+        for area, (left, top) in zip(self.radar_areas, self.areas[:, :2].tolist()):
+            area.move_to(left, top)
+    
+    def get_radar_states(self, enemies) -> np.ndarray:
+        """Returns 1 for every radar area a rocket overlaps, 0 otherwise.
+        Enemies can be given as sprites or as an array from rects_to_array.
+        """
+        rects = enemies if isinstance(enemies, np.ndarray) else rects_to_array(enemies)
+        if len(rects) == 0:
+            return np.zeros(len(self.areas), dtype=np.uint8)
+        
+        # Same test as pygame.Rect.colliderect for every (area, rocket) pair
+        areas = self.areas[:, None, :]
+        overlap = (
+            (areas[..., 0] < rects[:, 2]) & (areas[..., 2] > rects[:, 0]) &
+            (areas[..., 1] < rects[:, 3]) & (areas[..., 3] > rects[:, 1])
+        )
+        return overlap.any(axis=1).astype(np.uint8)
+    
+    def paint_areas(self, states):
+        for area, rocket_in_area in zip(self.radar_areas, states):
+            area.paint(rocket_in_area)
     
     def count_radar_areas(self):
-        return len(self.radar_areas)
+        return len(self.areas)
+
+class SpritePool:
+    """Keeps killed sprites of one class and hands them out again.
+    
+    get() respawns a free sprite (a new position and speed drawn the same
+    way as in the constructor) or creates one when the pool is empty, so
+    after the first few seconds of a game spawning allocates nothing.
+    Sprites return themselves to their pool when they are killed.
+    """
+    def __init__(self, sprite_class):
+        self.sprite_class = sprite_class
+        self.free = []
+        # Number of sprites ever created by this pool
+        self.created = 0
+    
+    def get(self, *args):
+        if self.free:
+            sprite = self.free.pop()
+            sprite.respawn(*args)
+            return sprite
+        sprite = self.sprite_class(*args)
+        sprite.pool = self
+        self.created += 1
+        return sprite
+    
+    def release(self, sprite):
+        self.free.append(sprite)
 
 # Define the enemy object by extending pygame.sprite.Sprite
 # The surface you draw on the screen is now an attribute of 'enemy'
 class Enemy(pygame.sprite.Sprite):
-    def __init__(self):
+    def __init__(self, rng: random.Random = random, grid: RocketGrid = None):
         super(Enemy, self).__init__()
-        self.surf = pygame.image.load("images/missle.png").convert()
-        self.surf.set_colorkey((255, 255, 255), RLEACCEL)
-        self.rect = self.surf.get_rect(
-            center=(
-                random.randint(SCREEN_WIDTH + 20, SCREEN_WIDTH + 100),
-                random.randint(0, SCREEN_HEIGHT),
-            )
+        self.surf = assets.get_surface("missle")
+        self.rect = assets.get_rect("missle")
+        self.pool = None
+        self.respawn(rng, grid)
+    
+    def respawn(self, rng: random.Random = random, grid: RocketGrid = None):
+        """Puts the rocket at a new random position behind the right edge."""
+        self.rect.center = (
+            rng.randint(SCREEN_WIDTH + 20, SCREEN_WIDTH + 100),
+            rng.randint(0, SCREEN_HEIGHT),
         )
-        self.speed = random.randint(5, 20)
+        self.speed = rng.randint(*ENEMY_SPEED_RANGE)
+        
+        # Keep the rocket in the grid used for collision and radar queries
+        self.grid = grid
+        if self.grid is not None:
+            self.grid.add(self)
 
     # Move the sprite based on speed
     # Remove the sprite when it passes the left edge of the screen
     def update(self):
         self.rect.move_ip(-self.speed, 0)
+        # Culling stays here instead of in RocketGrid: every rocket is moved
+        # anyway, so this test is free, while finding the rockets of the
+        # leftmost grid column would mean scanning the cells every frame
         if self.rect.right < 0:
             self.kill()
+        elif self.grid is not None:
+            self.grid.move(self)
+    
+    def kill(self):
+        was_alive = self.alive()
+        if self.grid is not None:
+            self.grid.remove(self)
+        super(Enemy, self).kill()
+        if was_alive and self.pool is not None:
+            self.pool.release(self)
     
     def position(self):
         """Returns rocket's position coordinates."""
@@ -121,16 +293,18 @@ class Enemy(pygame.sprite.Sprite):
 # Define the cloud object by extending pygame.sprite.Sprite
 # Use an image for a better-looking sprite
 class Cloud(pygame.sprite.Sprite):
-    def __init__(self):
+    def __init__(self, rng: random.Random = random):
         super(Cloud, self).__init__()
-        self.surf = pygame.image.load("images/cloud.png").convert()
-        self.surf.set_colorkey((0, 0, 0), RLEACCEL)
+        self.surf = assets.get_surface("cloud")
+        self.rect = assets.get_rect("cloud")
+        self.pool = None
+        self.respawn(rng)
+    
+    def respawn(self, rng: random.Random = random):
         # The starting position is randomly generated
-        self.rect = self.surf.get_rect(
-            center=(
-                random.randint(SCREEN_WIDTH + 20, SCREEN_WIDTH + 100),
-                random.randint(0, SCREEN_HEIGHT),
-            )
+        self.rect.center = (
+            rng.randint(SCREEN_WIDTH + 20, SCREEN_WIDTH + 100),
+            rng.randint(0, SCREEN_HEIGHT),
         )
 
     # Move the cloud based on a constant speed
@@ -139,15 +313,22 @@ class Cloud(pygame.sprite.Sprite):
         self.rect.move_ip(-5, 0)
         if self.rect.right < 0:
             self.kill()
+    
+    def kill(self):
+        was_alive = self.alive()
+        super(Cloud, self).kill()
+        if was_alive and self.pool is not None:
+            self.pool.release(self)
 
 # Define a player object by extending pygame.sprite.Sprite
 # The surface drawn on the screen is now an attribute of 'player'
 class Player(pygame.sprite.Sprite):
-    def __init__(self):
+    def __init__(self, radar_size: int = RADAR_SIZE):
         super(Player, self).__init__()
-        self.surf = pygame.image.load("images/jet.png").convert()
-        self.surf.set_colorkey((255, 255, 255), RLEACCEL)
-        self.rect = self.surf.get_rect()
+        self.surf = assets.get_surface("jet")
+        self.rect = assets.get_rect("jet")
+        # The plane is kept far enough from the edges for its radar to fit
+        self.radar_size = radar_size
     
     @classmethod
     def create_element(cls, left: int, top: int):
@@ -155,9 +336,8 @@ class Player(pygame.sprite.Sprite):
         based on given left and top values.
         """
         super(Player, cls).__init__(cls)
-        cls.surf = pygame.image.load("images/jet.png").convert()
-        cls.surf.set_colorkey((255, 255, 255), RLEACCEL)
-        cls.rect = cls.surf.get_rect()
+        cls.surf = assets.get_surface("jet")
+        cls.rect = assets.get_rect("jet")
         
         cls.rect.left = left
         cls.rect.top = top
@@ -187,12 +367,12 @@ class Player(pygame.sprite.Sprite):
         # Keep player on the screen
         if self.rect.left < 0:
             self.rect.left = 0
-        if self.rect.right > SCREEN_WIDTH - RADAR_SIZE*self.rect.width:
-            self.rect.right = SCREEN_WIDTH - RADAR_SIZE*self.rect.width
+        if self.rect.right > SCREEN_WIDTH - self.radar_size*self.rect.width:
+            self.rect.right = SCREEN_WIDTH - self.radar_size*self.rect.width
         if self.rect.top <= 0:
             self.rect.top = 0
-        if self.rect.bottom >= SCREEN_HEIGHT - RADAR_SIZE*self.rect.height:
-            self.rect.bottom = SCREEN_HEIGHT - RADAR_SIZE*self.rect.height
+        if self.rect.bottom >= SCREEN_HEIGHT - self.radar_size*self.rect.height:
+            self.rect.bottom = SCREEN_HEIGHT - self.radar_size*self.rect.height
     
     # Move the sprite based on user keypresses
     def update(self, pressed_keys):
@@ -0,0 +1,170 @@
+import asyncio
+import socket
+import time
+from collections import deque
+import numpy as np
+import torch
+from src.deep_qlearning.export import load_policy
+from src.deep_qlearning.replay_memory import pack_states, unpack_states
+
+HOST = '127.0.0.1'
+PORT = 5555
+STATE_SIZE = 120
+PACKED_STATE_SIZE = (STATE_SIZE + 7) // 8
+# A batch is run when it has MAX_BATCH_SIZE requests or its first request
+# waited MAX_WAIT_MS milliseconds
+MAX_BATCH_SIZE = 64
+MAX_WAIT_MS = 2.0
+# Seconds between two printed stats
+STATS_INTERVAL = 10.0
+LATENCY_WINDOW = 10_000
+
+class InferenceServer:
+    """Serves moves of one model to many clients over a socket.
+
+    A request is a bit-packed radar state (15 bytes), the response is one
+    byte with the index of the move. Requests of all connections are
+    grouped into micro-batches, every batch takes one forward pass.
+    """
+    def __init__(self, policy, max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS):
+        self.policy = policy
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        self.pending = []
+        # Created in serve() so they belong to the running event loop
+        self._has_requests = None
+        self._batch_full = None
+
+        self.requests = 0
+        self.batches = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.last_stats = time.perf_counter()
+        self.last_requests = 0
+
+    async def serve(self, host: str = HOST, port: int = PORT, unix_path: str = None):
+        """Listens on the unix socket if unix_path is given, on host:port otherwise."""
+        self._has_requests = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        if unix_path is not None:
+            server = await asyncio.start_unix_server(self._handle_client, path=unix_path)
+        else:
+            server = await asyncio.start_server(self._handle_client, host, port)
+        print('Serving on', unix_path or f'{host}:{port}')
+
+        batches = asyncio.ensure_future(self._run_batches())
+        async with server:
+            try:
+                await server.serve_forever()
+            finally:
+                batches.cancel()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                packed_state = await reader.readexactly(PACKED_STATE_SIZE)
+                move = loop.create_future()
+                self.pending.append((packed_state, move, time.perf_counter()))
+                self._has_requests.set()
+                if len(self.pending) >= self.max_batch_size:
+                    self._batch_full.set()
+                writer.write(bytes((await move,)))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._has_requests.wait()
+
+            # Wait for more requests until the batch is full or the first one waited too long
+            deadline = loop.time() + self.max_wait
+            while len(self.pending) < self.max_batch_size:
+                self._batch_full.clear()
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = self.pending[:self.max_batch_size]
+            del self.pending[:self.max_batch_size]
+            if not self.pending:
+                self._has_requests.clear()
+
+            self._run_batch(batch)
+            self._print_stats()
+
+    def _run_batch(self, batch: list):
+        packed_states = np.frombuffer(b''.join(request[0] for request in batch), dtype=np.uint8)
+        states = unpack_states(packed_states.reshape(len(batch), PACKED_STATE_SIZE), STATE_SIZE)
+        with torch.inference_mode():
+            moves = self.policy(torch.from_numpy(states)).argmax(dim=1).tolist()
+
+        now = time.perf_counter()
+        for (_, future, received), move in zip(batch, moves):
+            if not future.cancelled():
+                future.set_result(move)
+            self.latencies.append(now - received)
+        self.requests += len(batch)
+        self.batches += 1
+
+    def stats(self) -> dict:
+        latencies = np.array(self.latencies) * 1000
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'mean_batch_size': self.requests / max(self.batches, 1),
+            'p50_latency_ms': np.percentile(latencies, 50) if len(latencies) else 0.0,
+            'p99_latency_ms': np.percentile(latencies, 99) if len(latencies) else 0.0,
+        }
+
+    def _print_stats(self):
+        now = time.perf_counter()
+        if now - self.last_stats < STATS_INTERVAL:
+            return
+        stats = self.stats()
+        requests_per_sec = (self.requests - self.last_requests) / (now - self.last_stats)
+        print('Requests/s:', round(requests_per_sec, 1), 'Batch:', round(stats['mean_batch_size'], 1),
+              'p50 [ms]:', round(stats['p50_latency_ms'], 3), 'p99 [ms]:', round(stats['p99_latency_ms'], 3))
+        self.last_stats = now
+        self.last_requests = self.requests
+
+def run_server(model_path: str, host: str = HOST, port: int = PORT, unix_path: str = None):
+    """Loads a model (weights or exported TorchScript) and serves it until interrupted."""
+    torch.set_num_threads(1)
+    server = InferenceServer(load_policy(model_path))
+    try:
+        asyncio.run(server.serve(host, port, unix_path))
+    except KeyboardInterrupt:
+        print(server.stats())
+
+class PolicyClient:
+    """Blocking client of InferenceServer, a drop-in for Agent.get_action:
+
+        client = PolicyClient()
+        move = client.get_action(game.get_radar_states())
+        game.play_step(move)
+    """
+    def __init__(self, host: str = HOST, port: int = PORT, unix_path: str = None):
+        if unix_path is not None:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(unix_path)
+        else:
+            self.socket = socket.create_connection((host, port))
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def get_action(self, state) -> int:
+        self.socket.sendall(pack_states(state).tobytes())
+        response = self.socket.recv(1)
+        if not response:
+            raise ConnectionError('Inference server closed the connection')
+        return response[0]
+
+    def close(self):
+        self.socket.close()
@@ -1,62 +1,109 @@
 # Import the pygame module
+import random
 import pygame
-from src.game_utils.game_objects import Enemy, Player, Cloud, RadarRectangle, PlaneRadar, PlaneData
+from src.game_utils.game_objects import Enemy, Player, Cloud, RadarRectangle, PlaneRadar, PlaneData, RocketGrid, rects_to_array
+from src.game_utils.game_objects import SpritePool
 from src.game_utils.config import SCREEN_WIDTH, SCREEN_HEIGHT, RADAR_SIZE, RectObjectCoordinates, RadarSquares, SPEED
+from src.game_utils.config import ENEMY_SPAWN_FRAMES, CLOUD_SPAWN_FRAMES
 from src.game_utils.game_objects import Direction
+from src.game_utils.dirty_renderer import DirtyRectRenderer
+from src.game_utils import assets
+from src.profiling import profiler
 from pygame.locals import (
     K_ESCAPE,
     KEYDOWN,
     QUIT,
 )
 
-# Initialize pygame
-pygame.init()
-
 class FlightGame:
     # Define constants for the screen width and height
     
-    def __init__(self):
-        # Setup the clock for a decent framerate
-        self.clock = pygame.time.Clock()
-        # Create the screen object
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    def __init__(self, headless: bool = False, seed: int = None, radar_size: int = RADAR_SIZE):
+        # In headless mode nothing is drawn and the framerate is not capped,
+        # so play_step runs as fast as the CPU allows
+        self.headless = headless
+        self.radar_size = radar_size
         
-        # Create a custom event for adding a new enemy and cloud
-        self.ADDENEMY = pygame.USEREVENT + 1
-        pygame.time.set_timer(self.ADDENEMY, 250)
-        self.ADDCLOUD = pygame.USEREVENT + 2
-        pygame.time.set_timer(self.ADDCLOUD, 1000)
-        
-        self.reset()
+        # Rockets are spawned from their own RNG every ENEMY_SPAWN_FRAMES
+        # simulated frames, so a seeded game is reproducible and its
+        # difficulty does not depend on how fast the machine is
+        self.rng = random.Random(seed)
         
-    def reset(self):
-        self.direction = Direction.STAY
-        self.score = 0
+        # Setup the clock for a decent framerate
+        self.clock = pygame.time.Clock()
+        # Create the screen object, sprites have no images in headless mode
+        # so neither pygame modules nor a window are needed
+        assets.set_headless(self.headless)
+        self.screen = None
+        self.renderer = None
+        if not self.headless:
+            # Initialize pygame
+            pygame.init()
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            # Only the changed parts of the screen are redrawn every frame
+            self.renderer = DirtyRectRenderer(self.screen)
         
         # Create groups to hold enemy sprites and all sprites
         # - enemies is used for collision detection and position updates
         # - all_sprites is used for rendering
+        # Groups, pools, the grid and the radar live as long as the game,
+        # reset() only empties them
         self.enemies = pygame.sprite.Group()
         self.all_sprites = pygame.sprite.Group()
         self.clouds = pygame.sprite.Group()
+        # Spatial index of the enemies, kept up to date by Enemy.update
+        self.enemy_grid = RocketGrid()
+        # Killed rockets and clouds are respawned instead of created again
+        self.enemy_pool = SpritePool(Enemy)
+        self.cloud_pool = SpritePool(Cloud)
+        self.radar = None
+        
+        self.reset()
+        
+    def reset(self, seed: int = None):
+        if seed is not None:
+            self.rng.seed(seed)
+        
+        self.direction = Direction.STAY
+        self.score = 0
+        # Number of simulated frames, drives the spawn scheduler
+        self.frame = 0
+        
+        # Rockets and clouds return to their pools
+        self.destroy_rockets()
+        for cloud in self.clouds:
+            cloud.kill()
+        self.all_sprites.empty()
         
         # Instantiate player
-        self.player = Player()
+        self.player = Player(self.radar_size)
         self.all_sprites.add(self.player)
         self.update_plane_data()
         
         # Create plane radar
-        self.radar = PlaneRadar(
-                size = RADAR_SIZE,
-                plane_data=self.plane_data
-            )
+        if self.radar is None:
+            self.radar = PlaneRadar(
+                    size = self.radar_size,
+                    plane_data=self.plane_data,
+                    render=not self.headless
+                )
+        else:
+            self.radar.move_to(self.plane_data)
         
-        self.destroy_rockets()
+        if self.renderer is not None:
+            self.renderer.invalidate()
         
     def destroy_rockets(self):
         for enemy in self.enemies:
             enemy.kill()
     
+    def get_radar_states(self):
+        """Returns radar states, only rockets near the radar are tested."""
+        nearby_enemies = self.enemy_grid.near(self.radar.bounds)
+        # Rebuilt per call on purpose: about one rocket is near the radar, so
+        # this is cheaper than updating an array of all rockets every frame
+        return self.radar.get_radar_states(rects_to_array(nearby_enemies))
+    
     def update_plane_data(self):
         self.plane_data = PlaneData(
                 left=self.player.rect.left,
@@ -67,8 +114,8 @@ class FlightGame:
     
     def _move(self, action):
         # Action
-        # Array of 0s and 1s where 1 is move to be taken
-        # There can be just one 1 in the array
+        # Index of the move to be taken, or array of 0s and 1s
+        # where 1 is move to be taken (just one 1 in the array)
         # [top-right, right, bottom-right,
         # bottom, bottom-left, left,
         # top-left, top, no-move
@@ -84,17 +131,20 @@ class FlightGame:
             Direction.STAY,
         ]
         
-        self.direction = action.index(1)
+        self.direction = action.index(1) if isinstance(action, list) else int(action)
         self.player.move(clock_wise_directions[self.direction])
     
     def play_step(self, action):
         # Move
-        self._move(action)
+        with profiler.phase('move'):
+            self._move(action)
         
         # Check if game is over
         reward = 0 # rocket gone: +1, game over: -10, else: 0
         game_over = False
-        if pygame.sprite.spritecollideany(self.player, self.enemies):
+        with profiler.phase('collisions'):
+            collision = self.enemy_grid.collide(self.player.rect)
+        if collision:
             # If so, then remove the player and stop the loop
             self.player.kill()
             game_over = True
@@ -105,53 +155,65 @@ class FlightGame:
         reward,game_over,self.score = self._update_ui()
         return reward,game_over,self.score
     
+    def _spawn_objects(self):
+        """Adds new rockets and clouds based on the number of simulated frames."""
+        self.frame += 1
+        
+        # Add a new enemy
+        if self.frame % ENEMY_SPAWN_FRAMES == 0:
+            # Create the new enemy and add it to sprite groups
+            new_enemy = self.enemy_pool.get(self.rng, self.enemy_grid)
+            self.enemies.add(new_enemy)
+            self.all_sprites.add(new_enemy)
+        
+        # Add a new cloud (clouds are only decoration and use the global
+        # random module so they don't change the sequence of rockets)
+        if self.frame % CLOUD_SPAWN_FRAMES == 0 and not self.headless:
+            # Create the new cloud and add it to sprite groups
+            new_cloud = self.cloud_pool.get()
+            self.clouds.add(new_cloud)
+            self.all_sprites.add(new_cloud)
+    
     def _update_ui(self):
-        # for loop through the event queue
-        for event in pygame.event.get():
-            # Add a new enemy
-            if event.type == self.ADDENEMY:
-                # Create the new enemy and add it to sprite groups
-                new_enemy = Enemy()
-                self.enemies.add(new_enemy)
-                self.all_sprites.add(new_enemy)
-            # Add a new cloud
-            elif event.type == self.ADDCLOUD:
-                # Create the new cloud and add it to sprite groups
-                new_cloud = Cloud()
-                self.clouds.add(new_cloud)
-                self.all_sprites.add(new_cloud)
-        
-        self.screen.fill((135, 206, 250))
-        
-        rockets_before_movement = len(self.enemies)
-        self.enemies.update()
-        rockets_after_movement = len(self.enemies)
+        with profiler.phase('events'):
+            if not self.headless:
+                # Keep the window responsive
+                pygame.event.get()
+            
+            self._spawn_objects()
         
-        self.update_plane_data()
-        self.radar = PlaneRadar(
-                size = RADAR_SIZE,
-                plane_data=self.plane_data
-            )
+        with profiler.phase('enemies_update'):
+            rockets_before_movement = len(self.enemies)
+            self.enemies.update()
+            rockets_after_movement = len(self.enemies)
         
-        for area in self.radar.radar_areas:
-            area.paint_area(self.enemies)
-            self.screen.blit(area.surface, area.radar_rect)
+        with profiler.phase('radar'):
+            self.update_plane_data()
+            self.radar.move_to(self.plane_data)
+            if not self.headless:
+                self.radar.paint_areas(self.get_radar_states())
         
-        for entity in self.all_sprites:
-            self.screen.blit(entity.surf, entity.rect)
+        with profiler.phase('draw'):
+            if not self.headless:
+                dirty_rects = self.renderer.draw(self.all_sprites, self.radar)
         
         # Check if any enemies have collided with the player
-        if pygame.sprite.spritecollideany(self.player, self.enemies):
+        with profiler.phase('collisions'):
+            collision = self.enemy_grid.collide(self.player.rect)
+        if collision:
             # If so, then remove the player and stop the loop
             self.player.kill()
             game_over = True
             reward = -20
             return reward,game_over,self.score
         
-        # Update the display
-        pygame.display.flip()
-        
-        self.clock.tick(SPEED)
+        if not self.headless:
+            # Update the changed parts of the display
+            with profiler.phase('display_update'):
+                pygame.display.update(dirty_rects)
+            
+            with profiler.phase('clock_tick'):
+                self.clock.tick(SPEED)
 
         reward = abs(rockets_after_movement-rockets_before_movement)
         game_over = False
@@ -173,20 +235,9 @@ class FlightGame:
                 # Check for QUIT event. If QUIT, then set running to false.
                 elif event.type == QUIT:
                     running = False
-                
-                # # Add a new enemy
-                elif event.type == self.ADDENEMY:
-                    # Create the new enemy and add it to sprite groups
-                    new_enemy = Enemy()
-                    self.enemies.add(new_enemy)
-                    self.all_sprites.add(new_enemy)
-                    
-                # # Add a new cloud
-                elif event.type == self.ADDCLOUD:
-                    # Create the new cloud and add it to sprite groups
-                    new_cloud = Cloud()
-                    self.clouds.add(new_cloud)
-                    self.all_sprites.add(new_cloud)
+            
+            # Add new rockets and clouds
+            self._spawn_objects()
                 
             # Get all the keys currently pressed
             pressed_keys = pygame.key.get_pressed()
@@ -198,30 +249,21 @@ class FlightGame:
             self.enemies.update()
             self.clouds.update()
 
-            # Fill the screen with black
-            self.screen.fill((135, 206, 250))
-            
             if radar:
                 self.update_plane_data()
-                self.radar = PlaneRadar(
-                    size = RADAR_SIZE,
-                    plane_data=self.plane_data
-                )
-                
-                for area in self.radar.radar_areas:
-                    area.paint_area(self.enemies)
-                    self.screen.blit(area.surface, area.radar_rect)
+                self.radar.move_to(self.plane_data)
+                self.radar.paint_areas(self.get_radar_states())
             
-            for entity in self.all_sprites:
-                self.screen.blit(entity.surf, entity.rect)
+            # Redraw what moved or changed color
+            dirty_rects = self.renderer.draw(self.all_sprites, self.radar if radar else None)
             
-            if pygame.sprite.spritecollideany(self.player, self.enemies):
+            if self.enemy_grid.collide(self.player.rect):
                 # If so, then remove the player and stop the loop
                 self.player.kill()
                 break
             
-            # Update the display
-            pygame.display.flip()
+            # Update the changed parts of the display
+            pygame.display.update(dirty_rects)
 
             # Ensure program maintains a rate of 30 frames per second
             self.clock.tick(SPEED)
@@ -0,0 +1,36 @@
+import time
+import numpy as np
+from src.agent import STATE_SIZE, HIDDEN_SIZE, LR, GAMMA
+from src.deep_qlearning.model import Linear_QNet, QTrainer
+from src.episode_log import EpisodeLog, RECORDINGS_PATH
+
+PRETRAIN_EPOCHS = 5
+# Recorded transitions are independent of the network, so much larger
+# batches than in the online training can be used
+PRETRAIN_BATCH_SIZE = 4096
+
+def pretrain(path: str = RECORDINGS_PATH, epochs: int = PRETRAIN_EPOCHS,
+             batch_size: int = PRETRAIN_BATCH_SIZE, file_name: str = 'pretrained.pth', seed: int = None):
+    """
+    Trains a new network on episodes recorded with --training --record,
+    without running the game. Every epoch goes once over all recorded
+    transitions in shuffled batches. The weights are saved to
+    PlaneAI/<file_name> after every epoch.
+    """
+    log = EpisodeLog(path)
+    if log.state_size != STATE_SIZE:
+        raise ValueError(f'{path} holds states of size {log.state_size}, not {STATE_SIZE}')
+    print('Episodes:', len(log.episodes), 'Transitions:', len(log))
+
+    model = Linear_QNet(STATE_SIZE, HIDDEN_SIZE, 9)
+    trainer = QTrainer(model, lr=LR, gamma=GAMMA)
+    rng = np.random.default_rng(seed)
+
+    for epoch in range(1, epochs + 1):
+        start = time.perf_counter()
+        losses = [trainer.train_step(*batch) for batch in log.batches(batch_size, rng)]
+        transitions_per_sec = len(log) / (time.perf_counter() - start)
+        model.save(file_name)
+        print('Epoch:', epoch, 'Loss:', round(float(np.mean(losses)), 4),
+              'Transitions/s:', round(transitions_per_sec, 1))
+    return model
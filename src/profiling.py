@@ -0,0 +1,103 @@
+import time
+from collections import deque
+
+# Latency percentiles are computed from this many most recent calls of a phase
+LATENCY_WINDOW = 10_000
+# Seconds between two summaries printed by report_if_due
+REPORT_INTERVAL = 30.0
+
+class _NoPhase:
+    """Context manager used when profiling is off, does nothing."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NO_PHASE = _NoPhase()
+
+class _Phase:
+    __slots__ = ('stats', 'start')
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stats.add(time.perf_counter_ns() - self.start)
+        return False
+
+class PhaseStats:
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.latencies_ns = deque(maxlen=LATENCY_WINDOW)
+
+    def add(self, elapsed_ns: int):
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        self.latencies_ns.append(elapsed_ns)
+
+    def percentile_ms(self, percent: float) -> float:
+        latencies = sorted(self.latencies_ns)
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percent / 100))] / 1e6
+
+class Profiler:
+    """Per-phase timer for the game and training loops.
+
+    Wrap a phase with `with profiler.phase("name"):`. While the profiler
+    is disabled phase() returns a shared no-op context manager, so the
+    hooks cost close to nothing.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.phases = {}
+        self.report_interval = REPORT_INTERVAL
+        self.last_report = time.perf_counter()
+
+    def enable(self, report_interval: float = REPORT_INTERVAL):
+        self.enabled = True
+        self.report_interval = report_interval
+        self.last_report = time.perf_counter()
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.phases = {}
+
+    def phase(self, name: str):
+        if not self.enabled:
+            return _NO_PHASE
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = PhaseStats()
+        return _Phase(stats)
+
+    def summary(self) -> str:
+        """Returns a table of all phases sorted by cumulative time."""
+        lines = [f"{'phase':<20} {'calls':>9} {'total [s]':>10} {'mean [ms]':>10} {'p50 [ms]':>9} {'p99 [ms]':>9}"]
+        for name, stats in sorted(self.phases.items(), key=lambda item: -item[1].total_ns):
+            lines.append(
+                f"{name:<20} {stats.calls:>9} {stats.total_ns / 1e9:>10.3f} "
+                f"{stats.total_ns / stats.calls / 1e6:>10.3f} "
+                f"{stats.percentile_ms(50):>9.3f} {stats.percentile_ms(99):>9.3f}"
+            )
+        return '\n'.join(lines)
+
+    def report_if_due(self):
+        """Prints the summary if report_interval seconds passed since the last one."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if now - self.last_report >= self.report_interval:
+            print(self.summary())
+            self.last_report = now
+
+# Shared by the game and the training loop, enabled with main.py --profile
+profiler = Profiler()
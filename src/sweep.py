@@ -0,0 +1,191 @@
+import itertools
+import json
+import math
+import multiprocessing as mp
+import os
+import queue
+import random
+import time
+import traceback
+import numpy as np
+import torch
+from src.agent import Agent, LR, GAMMA, BATCH_SIZE, MAX_MEMORY, HIDDEN_SIZE, EXPLORATION_GAMES
+from src.planegame import FlightGame
+from src.game_utils.config import RADAR_SIZE
+
+SWEEP_RESULTS_PATH = './PlaneAI/sweep.json'
+# Games played by every trial unless the spec sets "games"
+SWEEP_GAMES = 100
+# The final score of a trial is the mean score of its last FINAL_WINDOW games
+FINAL_WINDOW = 10
+
+# Hyperparameters a spec can set, trials use these values for the others
+DEFAULT_CONFIG = {
+    'lr': LR,
+    'gamma': GAMMA,
+    'batch_size': BATCH_SIZE,
+    'max_memory': MAX_MEMORY,
+    'hidden_size': HIDDEN_SIZE,
+    'radar_size': RADAR_SIZE,
+    'exploration_games': EXPLORATION_GAMES,
+}
+
+def grid_configs(parameters: dict) -> list:
+    """Returns every combination of the listed values."""
+    names = list(parameters)
+    return [dict(zip(names, values)) for values in itertools.product(*(parameters[name] for name in names))]
+
+def random_configs(parameters: dict, trials: int, rng: random.Random) -> list:
+    """Draws trials configurations. A list is a set of choices, a
+    {"min", "max"} range is drawn uniformly (log-uniformly with "log": true),
+    as an integer if both bounds are integers.
+    """
+    configs = []
+    for _ in range(trials):
+        config = {}
+        for name, values in parameters.items():
+            if isinstance(values, list):
+                config[name] = rng.choice(values)
+                continue
+            low, high = values['min'], values['max']
+            if values.get('log'):
+                value = math.exp(rng.uniform(math.log(low), math.log(high)))
+            else:
+                value = rng.uniform(low, high)
+            config[name] = round(value) if isinstance(low, int) and isinstance(high, int) else value
+        configs.append(config)
+    return configs
+
+def _run_trial(config: dict, games: int, seed: int) -> dict:
+    """Trains a new agent for a number of headless games with the given hyperparameters."""
+    game = FlightGame(headless=True, seed=seed, radar_size=config['radar_size'])
+    state_size = game.radar.count_radar_areas()
+    agent = Agent(
+        (state_size, config['hidden_size'], 9),
+        lr=config['lr'],
+        gamma=config['gamma'],
+        batch_size=config['batch_size'],
+        max_memory=config['max_memory'],
+        exploration_games=config['exploration_games'],
+    )
+    agent.rng = np.random.default_rng(seed)
+
+    scores = []
+    steps = 0
+    start = time.perf_counter()
+    while agent.n_game < games:
+        state_old = agent.get_state(game)
+        final_move = agent.get_action(state_old)
+        reward, done, score = game.play_step(final_move)
+        state_new = agent.get_state(game)
+        agent.train_short_memory(state_old,final_move,reward,state_new,done)
+        agent.remember(state_old,final_move,reward,state_new,done)
+        steps += 1
+        if done:
+            game.reset()
+            agent.n_game += 1
+            agent.train_long_memory()
+            scores.append(score)
+
+    return {
+        'final_score': float(np.mean(scores[-FINAL_WINDOW:])),
+        'best_score': max(scores),
+        'steps_per_sec': steps / (time.perf_counter() - start),
+    }
+
+def _trial_process(trial_id: int, config: dict, games: int, seed: int, results):
+    """Runs one trial and reports its result or the exception it raised."""
+    torch.set_num_threads(1)
+    torch.manual_seed(seed)
+    try:
+        result = _run_trial(config, games, seed)
+    except Exception:
+        result = {'error': traceback.format_exc().strip().splitlines()[-1]}
+    results.put((trial_id, result))
+
+def run_sweep(spec_path: str, processes: int = None, output_path: str = SWEEP_RESULTS_PATH) -> list:
+    """
+    Runs the trials of a search spec as headless training jobs, at most
+    `processes` (default: number of cores) at a time. The spec is a JSON file:
+
+        {"method": "grid", "games": 100, "seed": 0,
+         "parameters": {"lr": [0.001, 0.0003], "hidden_size": [128, 256]}}
+
+        {"method": "random", "trials": 20,
+         "parameters": {"lr": {"min": 1e-4, "max": 1e-2, "log": true}, "gamma": [0.9, 0.99]}}
+
+    Every trial runs in its own process, so a trial that raises or crashes
+    is reported as failed and the others keep running. Results are printed
+    as a table sorted by final score and written to output_path.
+    """
+    with open(spec_path) as file:
+        spec = json.load(file)
+    unknown = set(spec['parameters']) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise ValueError(f"Unknown hyperparameters {sorted(unknown)}, expected some of {list(DEFAULT_CONFIG)}")
+
+    seed = spec.get('seed', 0)
+    games = spec.get('games', SWEEP_GAMES)
+    if spec.get('method', 'grid') == 'grid':
+        configs = grid_configs(spec['parameters'])
+    else:
+        configs = random_configs(spec['parameters'], spec['trials'], random.Random(seed))
+    configs = [dict(DEFAULT_CONFIG, **config) for config in configs]
+    processes = processes or os.cpu_count()
+    print('Trials:', len(configs), 'Processes:', processes, 'Games per trial:', games)
+
+    ctx = mp.get_context("spawn")
+    results_queue = ctx.Queue()
+    pending = list(enumerate(configs))
+    running = {}
+    results = {}
+    start = time.perf_counter()
+    try:
+        while pending or running:
+            while pending and len(running) < processes:
+                trial_id, config = pending.pop(0)
+                running[trial_id] = ctx.Process(
+                    target=_trial_process,
+                    args=(trial_id, config, games, seed + trial_id, results_queue),
+                    daemon=True,
+                )
+                running[trial_id].start()
+
+            try:
+                trial_id, result = results_queue.get(timeout=1)
+                results[trial_id] = result
+                print('Trial', trial_id, 'finished:', result)
+            except queue.Empty:
+                pass
+
+            for trial_id, process in list(running.items()):
+                if trial_id in results:
+                    process.join()
+                    del running[trial_id]
+                # A process that exits cleanly always reports its result,
+                # any other exit (killed, out of memory, segfault) is a crash
+                elif process.exitcode not in (None, 0):
+                    results[trial_id] = {'error': f'process exited with code {process.exitcode}'}
+                    print('Trial', trial_id, 'crashed:', results[trial_id]['error'])
+                    del running[trial_id]
+    finally:
+        for process in running.values():
+            process.terminate()
+
+    rows = [dict(configs[trial_id], trial=trial_id, **result) for trial_id, result in sorted(results.items())]
+    with open(output_path, 'w') as file:
+        json.dump(rows, file, indent=2)
+
+    names = list(spec['parameters'])
+    print(f"{'trial':>5} " + ' '.join(f'{name:>12}' for name in names)
+          + f" {'final':>8} {'best':>6} {'steps/s':>9}")
+    finished = sorted((row for row in rows if 'error' not in row), key=lambda row: row['final_score'], reverse=True)
+    for row in finished:
+        print(f"{row['trial']:>5} " + ' '.join(f'{row[name]:>12.6g}' for name in names)
+              + f" {row['final_score']:>8.2f} {row['best_score']:>6} {row['steps_per_sec']:>9.1f}")
+    for row in rows:
+        if 'error' in row:
+            print(f"{row['trial']:>5} failed: {row['error']}")
+    print('Sweep time [s]:', round(time.perf_counter() - start, 1), 'Results written to', output_path)
+
+    return rows
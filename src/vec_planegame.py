@@ -0,0 +1,170 @@
+import numpy as np
+from src.game_utils.config import (
+    SCREEN_WIDTH,
+    SCREEN_HEIGHT,
+    RADAR_SIZE,
+    ENEMY_SPAWN_FRAMES,
+    PLAYER_SIZE,
+    ENEMY_SIZE,
+    ENEMY_SPEED_RANGE,
+)
+from src.game_utils.game_objects import radar_offsets
+
+PLAYER_WIDTH, PLAYER_HEIGHT = PLAYER_SIZE
+ENEMY_WIDTH, ENEMY_HEIGHT = ENEMY_SIZE
+
+# Player moves for the action indices used by FlightGame._move
+# [top-right, right, bottom-right,
+# bottom, bottom-left, left,
+# top-left, top, no-move]
+PLAYER_STEP = 5
+ACTION_DX = PLAYER_STEP * np.array([1, 1, 1, 0, -1, -1, -1, 0, 0], dtype=np.int32)
+ACTION_DY = PLAYER_STEP * np.array([-1, 0, 1, 1, 1, 0, -1, -1, 0], dtype=np.int32)
+
+# Slowest rocket spawned at the far right needs this many frames to leave
+# the screen, so there are never more rockets alive in one game
+MAX_ENEMIES = (SCREEN_WIDTH + 100 + ENEMY_WIDTH) // (ENEMY_SPEED_RANGE[0] * ENEMY_SPAWN_FRAMES) + 2
+
+class VecFlightEnv:
+    """N independent flight games stepped in lockstep.
+
+    Player and rocket positions of all games are kept in NumPy arrays and
+    follow the same rules as FlightGame.play_step (Player.move, Enemy.update,
+    frame based spawning, -10 / -20 crash rewards and +1 per rocket gone),
+    so experience can be collected from many games with one Python call.
+
+    Usage:
+        env = VecFlightEnv(64, seed=0)
+        states = env.reset()
+        while ...:
+            next_states, rewards, dones, scores = env.step(actions)
+            states = env.states
+    """
+    def __init__(self, n_games: int, seed: int = None):
+        self.n_games = n_games
+        self.rng = np.random.default_rng(seed)
+
+        # Player is kept on the screen like in Player._keep_me_on_the_screen
+        self.max_left = SCREEN_WIDTH - RADAR_SIZE*PLAYER_WIDTH - PLAYER_WIDTH
+        self.max_top = SCREEN_HEIGHT - RADAR_SIZE*PLAYER_HEIGHT - PLAYER_HEIGHT
+
+        self.offsets = radar_offsets(RADAR_SIZE, PLAYER_WIDTH, PLAYER_HEIGHT)
+
+        self.player_left = np.zeros(n_games, dtype=np.int32)
+        self.player_top = np.zeros(n_games, dtype=np.int32)
+        self.frames = np.zeros(n_games, dtype=np.int64)
+        self.scores = np.zeros(n_games, dtype=np.int64)
+
+        self.enemy_left = np.zeros((n_games, MAX_ENEMIES), dtype=np.int32)
+        self.enemy_top = np.zeros((n_games, MAX_ENEMIES), dtype=np.int32)
+        self.enemy_speed = np.zeros((n_games, MAX_ENEMIES), dtype=np.int32)
+        self.alive = np.zeros((n_games, MAX_ENEMIES), dtype=bool)
+
+        self.reset()
+
+    def reset(self) -> np.ndarray:
+        """Resets all games and returns their (N, radar areas) states."""
+        self._reset_games(np.ones(self.n_games, dtype=bool))
+        self.states = np.zeros((self.n_games, len(self.offsets)), dtype=np.uint8)
+        return self.states
+
+    def _reset_games(self, mask: np.ndarray):
+        # New player starts in the top-left corner like Player()
+        self.player_left[mask] = 0
+        self.player_top[mask] = 0
+        self.frames[mask] = 0
+        self.scores[mask] = 0
+        self.alive[mask] = False
+
+    def step(self, actions):
+        """Moves all games by one frame.
+
+        Returns next states, rewards, dones and scores. For finished games
+        next states and scores are the final ones; these games are reset
+        right away and env.states holds the states to act on next.
+        """
+        actions = np.asarray(actions)
+        rewards = np.zeros(self.n_games, dtype=np.float32)
+
+        # Move the players
+        self.player_left = np.clip(self.player_left + ACTION_DX[actions], 0, self.max_left)
+        self.player_top = np.clip(self.player_top + ACTION_DY[actions], 0, self.max_top)
+
+        # Player flew into a rocket
+        crashed = self._player_collisions()
+        rewards[crashed] = -10
+        running = ~crashed
+
+        # Spawn and move the rockets
+        self.frames[running] += 1
+        self._spawn_enemies(running & (self.frames % ENEMY_SPAWN_FRAMES == 0))
+
+        moving = self.alive & running[:, None]
+        self.enemy_left[moving] -= self.enemy_speed[moving]
+        gone = moving & (self.enemy_left + ENEMY_WIDTH < 0)
+        self.alive &= ~gone
+        rockets_gone = gone.sum(axis=1)
+
+        # Rocket flew into the player
+        hit = running & self._player_collisions()
+        rewards[hit] = -20
+
+        scored = running & ~hit
+        rewards[scored] = rockets_gone[scored]
+        self.scores[scored] += rockets_gone[scored]
+
+        dones = crashed | hit
+        next_states = self.get_states()
+        scores = self.scores.copy()
+
+        # Auto-reset finished games, a new game has no rockets on the radar
+        self._reset_games(dones)
+        self.states = next_states.copy()
+        self.states[dones] = 0
+
+        return next_states, rewards, dones, scores
+
+    def _spawn_enemies(self, mask: np.ndarray):
+        games = np.flatnonzero(mask)
+        if len(games) == 0:
+            return
+
+        # First free slot of every game
+        slots = np.argmin(self.alive[games], axis=1)
+        n = len(games)
+
+        # Same ranges as in Enemy.__init__
+        center_x = self.rng.integers(SCREEN_WIDTH + 20, SCREEN_WIDTH + 100, size=n, endpoint=True)
+        center_y = self.rng.integers(0, SCREEN_HEIGHT, size=n, endpoint=True)
+        self.enemy_left[games, slots] = center_x - ENEMY_WIDTH // 2
+        self.enemy_top[games, slots] = center_y - ENEMY_HEIGHT // 2
+        self.enemy_speed[games, slots] = self.rng.integers(*ENEMY_SPEED_RANGE, size=n, endpoint=True)
+        self.alive[games, slots] = True
+
+    def _player_collisions(self) -> np.ndarray:
+        player_left = self.player_left[:, None]
+        player_top = self.player_top[:, None]
+        overlap = (
+            (player_left < self.enemy_left + ENEMY_WIDTH) &
+            (player_left + PLAYER_WIDTH > self.enemy_left) &
+            (player_top < self.enemy_top + ENEMY_HEIGHT) &
+            (player_top + PLAYER_HEIGHT > self.enemy_top)
+        )
+        return (overlap & self.alive).any(axis=1)
+
+    def get_states(self) -> np.ndarray:
+        """Returns (N, radar areas) matrix with 1 where a rocket is on the radar."""
+        # (N, areas, 1) against (N, 1, rockets)
+        area_left = (self.player_left[:, None] + self.offsets[:, 0])[:, :, None]
+        area_top = (self.player_top[:, None] + self.offsets[:, 1])[:, :, None]
+        enemy_left = self.enemy_left[:, None, :]
+        enemy_top = self.enemy_top[:, None, :]
+
+        overlap = (
+            (area_left < enemy_left + ENEMY_WIDTH) &
+            (area_left + PLAYER_WIDTH > enemy_left) &
+            (area_top < enemy_top + ENEMY_HEIGHT) &
+            (area_top + PLAYER_HEIGHT > enemy_top) &
+            self.alive[:, None, :]
+        )
+        return overlap.any(axis=2).astype(np.uint8)